@@ -0,0 +1,536 @@
+"""
+Static control-flow analysis of memory images.
+
+Builds the control-flow graph of a mnemonic image without running it, with
+the same rules as the CPU:
+- jumps and their targets;
+- JSA calls, which enter at the target + 1;
+- CALL, which enters at the target, and RET, which may return after any CALL;
+- skip edges of INC/DEC/SKZ/SKP/SKN;
+- indirect jumps.
+
+An indirect jump through a pointer that no reachable instruction writes goes
+to the pointer's value. A pointer written only by JSA is a return address,
+so the jump goes back after each call to that subroutine. Any other indirect
+jump is left unresolved, and so is RET once PUSH or POP is reachable.
+
+From the graph it reports:
+- cells no path reaches and no instruction or DMA transfer uses as data;
+- cells that are both executed and read or written as data (including
+  self-modifying code);
+- a worst-case step bound.
+DMA blocks are found by following the straight-line code from the entry and
+tracking AC and the DMA registers up to each OPT. If a reachable OPT cannot be
+followed, any cell may be a DMA block, so no cell is reported as unreachable.
+Each call is costed with its subroutine's own bound, so a subroutine called
+from several places is not mistaken for a loop. The bound is exact for
+loop-free code. A loop is bounded only if it is a
+simple cycle that leaves through the skip of an INC/DEC counter that nothing
+else writes. Any other loop makes the bound unknown.
+
+Batch runs use step_limit() instead of a blind timeout and skip images that
+are dead (nothing to execute, or no way to finish).
+
+Usage (from the Simulator directory):
+    python analyzer.py addition.txt SUBROUTINE.txt dma_copy.txt --run
+"""
+import argparse
+
+from cpu import CPU, MEMORY_REFERENCE, load_memory_file
+from dma import COMPARE, FILL_BLOCK, MOVE
+
+JUMPS = {"JMP", "JZE", "JSA", "CALL"}
+MEMORY_WRITERS = {"STR", "INC", "DEC", "JSA"}
+EXIT = -1  # Graph node for leaving the program: HAL, an empty cell or the end of memory
+
+
+def parse_instruction(cell):
+    """Returns (mnemonic, indirect, address) the way the CPU splits a cell; address is None if absent."""
+    parts = cell.split(maxsplit=2)
+    if not parts:
+        return None, False, None
+    mnemonic = parts[0]
+    if len(parts) == 1 or mnemonic not in MEMORY_REFERENCE:
+        return mnemonic, False, None
+    try:
+        return mnemonic, len(parts) == 3, int(parts[-1])
+    except ValueError:
+        return mnemonic, False, None
+
+
+def _number(cell):
+    try:
+        return int(cell)
+    except ValueError:
+        return None
+
+
+class ImageAnalysis:
+    """Control-flow graph, code/data classification and step bound of one memory image."""
+
+    def __init__(self, memory, entry=0):
+        self.memory = list(memory)
+        self.entry = entry
+        self.edges = {}  # address -> successor addresses (EXIT to leave the program)
+        self.subroutines = {}  # JSA target -> call sites
+        self.unresolved = []  # Addresses of indirect jumps and RETs whose target is unknown
+        self.data = set()  # Cells read or written as data by reachable instructions
+        self.unknown_writes = []  # Reachable instructions that may write anywhere (indirect stores, DMA)
+        self._analyze()
+
+    # ------------------------------------------------------------ graph
+    def _analyze(self):
+        resolved = {}  # Pointer -> resolved jump targets, refined until nothing changes
+        for _ in range(len(self.memory) + 1):
+            self._build(resolved)
+            refined = self._resolve_pointers()
+            if refined == resolved:
+                break
+            resolved = refined
+        self.reachable = sorted(self.edges)
+        self.dma_blocks = self._dma_blocks()
+        if self.dma_blocks is None:
+            self.unreachable = []  # A DMA transfer may read or write any cell
+        else:
+            for _, cells in self.dma_blocks:
+                self.data.update(cells)
+            self.unreachable = [address for address, cell in enumerate(self.memory)
+                                if cell.strip() and address not in self.edges and address not in self.data]
+        self.code_data_overlap = sorted(self.data & set(self.edges))
+        self.executes_data = [address for address in self.reachable
+                              if _number(self.memory[address]) is not None]
+        # A stored value turns an empty cell into a no-op that falls through, so the path continues
+        self.written_empty = sorted(address for address in self.empty_targets if address in self.writers)
+        self.step_bound, self.bound_reason = self._step_bound()
+        self.can_terminate = self._can_terminate()
+
+    def _build(self, resolved):
+        self.edges = {}
+        self.subroutines = {}
+        self.calls = {}  # JSA/CALL address -> first instruction of each subroutine it may call
+        self.stack_calls = []  # CALL addresses
+        self.stack_returns = []  # RET addresses
+        self.empty_targets = set()  # Empty cells that a reachable instruction falls through or jumps to
+        self.unresolved = []
+        self.data = set()
+        self.unknown_writes = []
+        self.writers = {}  # Cell -> addresses of reachable instructions that store to it
+        self.indirect_refs = []  # (pc, mnemonic, pointer) of reachable indirect loads and stores
+        pending = [self.entry]
+        while pending:
+            while pending:
+                pc = pending.pop()
+                if pc in self.edges or not 0 <= pc < len(self.memory) or not self.memory[pc].strip():
+                    continue
+                successors = self._successors(pc, resolved)
+                self.edges[pc] = successors
+                pending.extend(successor for successor in successors if successor != EXIT)
+            # RET goes back after any CALL found so far (an empty stack stops the CPU), which may find more
+            returns = self._next(*(site + 1 for site in self.stack_calls)) if self.stack_calls else [EXIT]
+            for pc in self.stack_returns:
+                self.edges[pc] = returns
+            pending = [address for address in returns if address != EXIT and address not in self.edges]
+        if any(self.memory[pc].split()[0] in ("PUSH", "POP") for pc in self.edges):
+            # The stack may hold any AC value, so RET can go anywhere
+            self.unresolved += self.stack_returns
+
+        # An indirect operand is known when its pointer is never stored to; resolving one store
+        # may make another pointer written, so repeat until nothing changes
+        unresolved_refs = self.indirect_refs
+        while True:
+            remaining = []
+            for pc, mnemonic, pointer in unresolved_refs:
+                target = self._target(pointer)
+                if pointer in self.writers or target is None:
+                    remaining.append((pc, mnemonic, pointer))
+                    continue
+                self.data.add(target)
+                if mnemonic in MEMORY_WRITERS:
+                    self.writers.setdefault(target, []).append(pc)
+            if len(remaining) == len(unresolved_refs):
+                break
+            unresolved_refs = remaining
+        self.unknown_writes += [pc for pc, mnemonic, _ in unresolved_refs if mnemonic in MEMORY_WRITERS]
+
+    def _target(self, pointer):
+        """Value of a pointer cell as an address, or None."""
+        if 0 <= pointer < len(self.memory):
+            return _number(self.memory[pointer])
+        return None
+
+    def _successors(self, pc, resolved):
+        mnemonic, indirect, address = parse_instruction(self.memory[pc])
+        if mnemonic == "HAL":
+            return [EXIT]
+        if mnemonic == "RET":
+            self.stack_returns.append(pc)
+            return []  # Filled in by _build once the calls are known
+        if mnemonic == "OPT":
+            self.unknown_writes.append(pc)
+        if address is None:
+            if mnemonic in ("SKZ", "SKP", "SKN", "SFO"):
+                return self._next(pc + 1, pc + 2)
+            return self._next(pc + 1)  # Register, I/O, data words and malformed cells fall through
+
+        if indirect:
+            self.data.add(address)  # The pointer
+            if mnemonic not in JUMPS:
+                self.indirect_refs.append((pc, mnemonic, address))
+                return self._next(pc + 1, pc + 2) if mnemonic in ("INC", "DEC") else self._next(pc + 1)
+            targets = resolved.get(address)
+        else:
+            targets = [address]
+
+        if mnemonic in JUMPS:
+            if targets is None:
+                self.unresolved.append(pc)
+                if mnemonic == "JSA":
+                    self.unknown_writes.append(pc)  # The return address goes to an unknown cell
+                targets = []
+            if mnemonic == "CALL":
+                self.stack_calls.append(pc)
+                self.calls[pc] = targets
+                for target in targets:
+                    self.subroutines.setdefault(target, []).append(pc)
+                return self._next(*targets)
+            if mnemonic == "JSA":
+                self.calls[pc] = [target + 1 for target in targets]
+                for target in targets:
+                    self.subroutines.setdefault(target, []).append(pc)
+                    self.data.add(target)
+                    self.writers.setdefault(target, []).append(pc)
+                return self._next(*(target + 1 for target in targets))
+            if mnemonic == "JZE":
+                return self._next(pc + 1, *targets)
+            return self._next(*targets)
+
+        self.data.add(address)
+        if mnemonic in MEMORY_WRITERS:
+            self.writers.setdefault(address, []).append(pc)
+        if mnemonic in ("INC", "DEC"):
+            return self._next(pc + 1, pc + 2)
+        return self._next(pc + 1)
+
+    def _next(self, *addresses):
+        """Successor list; addresses outside memory or on empty cells stop the CPU."""
+        successors = []
+        for address in addresses:
+            if not 0 <= address < len(self.memory):
+                address = EXIT
+            elif not self.memory[address].strip():
+                self.empty_targets.add(address)
+                address = EXIT
+            if address not in successors:
+                successors.append(address)
+        return successors
+
+    def _resolve_pointers(self):
+        """Jump targets of every pointer used by a reachable indirect jump."""
+        resolved = {}
+        self.returns = {}  # Return-address pointer -> initial target if the body also runs without a call
+        for pc in self.edges:
+            mnemonic, indirect, pointer = parse_instruction(self.memory[pc])
+            if not indirect or mnemonic not in JUMPS or pointer in resolved:
+                continue
+            if self.unknown_writes:
+                continue  # Any cell may change
+            writers = self.writers.get(pointer, [])
+            if not writers:
+                target = self._target(pointer)
+                if target is not None:
+                    resolved[pointer] = [target]
+            elif all(parse_instruction(self.memory[writer])[0] == "JSA" for writer in writers):
+                # A return address: back after each call
+                targets = [writer + 1 for writer in sorted(set(writers))]
+                calls = self.subroutines.get(pointer, [])
+                entered_directly = any(pointer + 1 in successors and address not in calls
+                                       for address, successors in self.edges.items())
+                self.returns[pointer] = None
+                if (entered_directly or self.entry == pointer + 1) and self._target(pointer) is not None:
+                    targets.append(self._target(pointer))  # Initial value, if the body runs without a call
+                    self.returns[pointer] = self._target(pointer)
+                resolved[pointer] = targets
+        return resolved
+
+    def _dma_blocks(self):
+        """(OPT address, cells it reads or writes) for every reachable OPT, or None if one is unknown.
+
+        Follows the code from the entry while it has a single successor, tracking AC and the DMA
+        registers through CLR, LDA, ADD, SUB, INA, SPI, PUT and SPO. Both start unknown, since a
+        run may begin with any state.
+        """
+        opts = [pc for pc in self.edges if parse_instruction(self.memory[pc])[0] == "OPT"]
+        if not opts:
+            return []
+        if any(pc not in opts for pc in self.unknown_writes):
+            return None  # An indirect store may change the values loaded into AC
+        blocks = []
+        written = set()  # Cells changed by earlier transfers
+        ac = selected = None
+        registers = [None] * 4
+        pc = self.entry
+        seen = set()
+        while pc in self.edges and pc not in seen:
+            seen.add(pc)
+            mnemonic, indirect, address = parse_instruction(self.memory[pc])
+            if indirect:
+                break
+            if mnemonic in ("LDA", "ADD", "SUB") and address is not None:
+                value = None if address in self.writers or address in written else self._target(address)
+                if mnemonic == "LDA":
+                    ac = value
+                elif ac is not None and value is not None:
+                    ac = ac + value if mnemonic == "ADD" else ac - value
+                else:
+                    ac = None
+            elif mnemonic == "CLR":
+                ac = 0
+            elif mnemonic == "INA":
+                ac = None if ac is None else ac + 1
+            elif mnemonic == "SPO":
+                ac = None  # The result is not followed
+            elif mnemonic == "SPI":
+                selected = None if ac is None else ac % len(registers)
+            elif mnemonic == "PUT":
+                if selected is None:
+                    registers = [None] * len(registers)  # Some register changed, but not which
+                else:
+                    registers[selected] = ac
+                    selected = (selected + 1) % len(registers)
+            elif mnemonic == "OPT":
+                cells = self._dma_cells(ac, registers)
+                if cells is None:
+                    return None
+                blocks.append((pc, cells))
+                if ac == FILL_BLOCK:
+                    written.update(cells)
+                elif ac == MOVE:
+                    written.update(cells[len(cells) // 2:])  # The destination block
+            elif mnemonic not in ("STR", "OUT"):
+                break  # Anything else may change AC in ways not followed here
+            if len(self.edges[pc]) != 1:
+                break
+            pc = self.edges[pc][0]
+        if len(blocks) < len(opts):
+            return None
+        return blocks
+
+    def _dma_cells(self, mode, registers):
+        """Cells of the DMA operation mode with the given registers, source block first; None if unknown."""
+        source, destination, count = registers[:3]
+        if mode is None or count is None or destination is None or (mode != FILL_BLOCK and source is None):
+            return None
+        if mode not in (MOVE, FILL_BLOCK, COMPARE) or count < 0:
+            return []  # The operation fails without touching memory
+        blocks = [destination] if mode == FILL_BLOCK else [source, destination]
+        if not all(0 <= block and block + count <= len(self.memory) for block in blocks):
+            return []
+        return [block + offset for block in blocks for offset in range(count)]
+
+    # ------------------------------------------------------------ bound
+    def _bound_graph(self):
+        """Edges used for the bound: a call continues after its call site and a return ends the subroutine.
+
+        This keeps the returns of a subroutine called from several places from looking like a loop.
+        """
+        graph = {}
+        for address, successors in self.edges.items():
+            mnemonic, indirect, pointer = parse_instruction(self.memory[address])
+            if address in self.calls:
+                graph[address] = self._next(address + 1)
+            elif mnemonic == "RET":
+                graph[address] = [EXIT]
+            elif indirect and mnemonic in ("JMP", "JZE") and pointer in self.returns:
+                graph[address] = [EXIT]
+                if self.returns[pointer] is not None:
+                    graph[address] = self._next(self.returns[pointer])  # Body also entered without a call
+                if mnemonic == "JZE":
+                    graph[address] = self._next(address + 1, *graph[address])
+            else:
+                graph[address] = successors
+        for address, successors in graph.items():
+            # A call whose subroutine never returns has no reachable continuation
+            graph[address] = [s for s in successors if s == EXIT or s in self.edges] or [EXIT]
+        return graph
+
+    def _components(self, graph, start):
+        """Strongly connected components reachable from start (iterative Tarjan), sinks first."""
+        index = {start: 0}
+        low = {start: 0}
+        stack = [start]
+        on_stack = {start}
+        components = []
+        work = [(start, iter(graph[start]))]
+        while work:
+            node, successors = work[-1]
+            for successor in successors:
+                if successor == EXIT:
+                    continue
+                if successor not in index:
+                    index[successor] = low[successor] = len(index)
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work.append((successor, iter(graph[successor])))
+                    break
+                if successor in on_stack:
+                    low[node] = min(low[node], index[successor])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+        return components
+
+    def _loop_steps(self, component, graph, cost):
+        """Upper bound on the steps spent in a looping component, or (None, reason)."""
+        members = set(component)
+        if any(len([s for s in graph[address] if s in members]) != 1 for address in component):
+            return None, f"loop at {sorted(members)} is not a simple cycle"
+        for address in component:
+            mnemonic, indirect, counter = parse_instruction(self.memory[address])
+            if mnemonic not in ("INC", "DEC") or indirect or counter in members:
+                continue
+            if address + 2 in members or self.writers.get(counter) != [address]:
+                continue  # The skip must leave the loop and nothing else may change the counter
+            value = self._target(counter)
+            if value is None:
+                continue
+            iterations = -value if mnemonic == "INC" else value
+            if iterations <= 0:
+                return None, f"counter {counter} of the loop at {sorted(members)} never reaches zero"
+            # A loop may be entered part-way, hence one extra pass
+            return (iterations + 1) * sum(cost[member] for member in component), None
+        return None, f"no counter bounds the loop at {sorted(members)}"
+
+    def _bound_from(self, start, graph, active):
+        """(Worst-case steps from start, None) or (None, reason); subroutine calls are costed recursively."""
+        if start == EXIT:
+            return 0, None
+        # Components come out sinks first, so every successor's bound is known when needed
+        component_of = {}
+        bound = {}
+        for number, component in enumerate(self._components(graph, start)):
+            members = set(component)
+            cost = {}
+            for address in component:
+                component_of[address] = number
+                cost[address] = 1
+                for body in self.calls.get(address, []):
+                    if body in active:
+                        return None, f"subroutine at {body} is re-entered before it returns"
+                    steps, reason = self._bound_from(self._next(body)[0], graph, active | {body})
+                    if steps is None:
+                        return None, reason
+                    cost[address] = max(cost[address], 1 + steps)
+            after = 0
+            for address in component:
+                for successor in graph[address]:
+                    if successor != EXIT and successor not in members:
+                        after = max(after, bound[component_of[successor]])
+            if len(component) == 1 and component[0] not in graph[component[0]]:
+                bound[number] = cost[component[0]] + after
+                continue
+            if len(component) == 1:
+                return None, f"address {component[0]} jumps to itself forever"
+            steps, reason = self._loop_steps(component, graph, cost)
+            if steps is None:
+                return None, reason
+            bound[number] = steps + after
+        return bound[component_of[start]], None
+
+    def _step_bound(self):
+        if not self.edges:
+            return 0, "nothing to execute"
+        if self.unresolved:
+            return None, f"jumps at {self.unresolved} could not be resolved"
+        if self.unknown_writes:
+            return None, f"stores at {self.unknown_writes} may change any cell (indirect store or DMA)"
+        written_code = [address for address in self.code_data_overlap if address in self.writers]
+        written_code += self.written_empty
+        if written_code:
+            return None, f"self-modifying code at {written_code}"
+        steps, reason = self._bound_from(self.entry, self._bound_graph(), frozenset())
+        return steps, reason or "bounded"
+
+    def _can_terminate(self):
+        """False when no path from the entry leaves the program and nothing can change the code."""
+        if not self.edges or self.unresolved or self.unknown_writes:
+            return True
+        if any(0 <= address < len(self.memory) and (address in self.edges or not self.memory[address].strip())
+               for address in self.writers):
+            return True  # Stores into code or empty cells may open a way out
+        return any(EXIT in successors for successors in self.edges.values())
+
+    @property
+    def dead(self):
+        """True for images that execute nothing or can never finish."""
+        return not self.edges or not self.can_terminate
+
+    def step_limit(self, default):
+        """Step limit for a run of this image: the bound when known, else default."""
+        return self.step_bound if self.step_bound is not None else default
+
+    def report(self):
+        return {
+            "entry": self.entry,
+            "reachable": self.reachable,
+            "edges": {address: [("exit" if s == EXIT else s) for s in successors]
+                      for address, successors in sorted(self.edges.items())},
+            "subroutines": {target: sorted(sites) for target, sites in sorted(self.subroutines.items())},
+            "unresolved": self.unresolved,
+            "unreachable": self.unreachable,
+            "code_data_overlap": self.code_data_overlap,
+            "executes_data": self.executes_data,
+            "step_bound": self.step_bound,
+            "bound_reason": self.bound_reason,
+            "dead": self.dead,
+        }
+
+
+def analyze_memory(memory, entry=0):
+    """Analyses a mnemonic memory image; see ImageAnalysis."""
+    return ImageAnalysis(memory, entry)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Statically analyse memory images before running them.")
+    parser.add_argument("files", nargs="+", help="memory files (index:value per line)")
+    parser.add_argument("--entry", type=int, default=0, help="start address")
+    parser.add_argument("--run", action="store_true",
+                        help="run each image that can finish, limited to its step bound")
+    parser.add_argument("--max-steps", type=int, default=100000, help="step limit when the bound is unknown")
+    args = parser.parse_args()
+
+    for file_path in args.files:
+        memory = load_memory_file(file_path)
+        analysis = analyze_memory(memory, args.entry)
+        bound = analysis.step_bound if analysis.step_bound is not None else "unknown"
+        print(f"{file_path}: reachable={analysis.reachable} step bound={bound} ({analysis.bound_reason})")
+        if analysis.subroutines:
+            print(f"  subroutines: {analysis.subroutines}")
+        if analysis.unreachable:
+            print(f"  unreachable cells: {analysis.unreachable}")
+        if analysis.code_data_overlap:
+            print(f"  cells used as code and data: {analysis.code_data_overlap}")
+        if analysis.executes_data:
+            print(f"  data executed as code: {analysis.executes_data}")
+        if analysis.dead:
+            print("  dead image: it executes nothing or can never finish")
+        elif args.run:
+            cpu = CPU(memory)
+            cpu.PC = args.entry
+            executed = cpu.run(analysis.step_limit(args.max_steps))
+            print(f"  ran {executed} steps: AC={cpu.AC} PC={cpu.PC} halted={cpu.halted}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Transfer animations for the processor view.
+
+Every instruction is played as one QSequentialAnimationGroup of up to three
+phases: fetch (memory -> IR), operand (memory -> AC) and writeback
+(AC -> memory). The group, the phase animations and a pool of transfer
+labels (one per phase) are created once and reused for every instruction.
+Their signals are connected once, here. The work an instruction attaches to
+a phase is kept as plain callbacks and dropped when the instruction
+finishes, so nothing accumulates over a long session.
+"""
+from PyQt5.QtCore import QAbstractAnimation, QPropertyAnimation, QSequentialAnimationGroup
+from PyQt5.QtWidgets import QLabel
+
+FETCH, OPERAND, WRITEBACK = "fetch", "operand", "writeback"
+PHASES = (FETCH, OPERAND, WRITEBACK)
+PHASE_DURATION = 3000  # Milliseconds per transfer
+TRANSFER_STYLE = "background-color: yellow; border: 2px solid red; font-size: 16px;"
+
+
+class TransferAnimator:
+    def __init__(self, parent):
+        self.group = QSequentialAnimationGroup(parent)
+        self.labels = {}  # phase -> reusable transfer label
+        self.animations = {}  # phase -> its QPropertyAnimation
+        self.phases = {}  # phase -> callbacks and text of the instruction being played
+        self.building = False
+
+        for phase in PHASES:
+            label = QLabel(parent)
+            label.setStyleSheet(TRANSFER_STYLE)
+            label.hide()
+            animation = QPropertyAnimation(label, b"geometry", parent)
+            animation.setDuration(PHASE_DURATION)
+            animation.finished.connect(lambda phase=phase: self._phase_finished(phase))
+            self.labels[phase] = label
+            self.animations[phase] = animation
+
+        self.group.currentAnimationChanged.connect(self._phase_started)
+        self.group.finished.connect(self._instruction_finished)
+
+    def begin(self):
+        """Starts collecting the phases of a new instruction."""
+        self.finish()
+        while self.group.animationCount():
+            self.group.takeAnimation(0)
+        self.phases.clear()
+        self.building = True
+
+    def add(self, phase, text, alignment, keyframes, on_start=None, on_finish=None):
+        """Queues a transfer for the instruction being built, or plays it alone if none is.
+
+        text is called when the phase starts, before on_start; keyframes are (step, QRect) pairs
+        from 0.0 to 1.0. on_finish receives the text that was carried.
+        """
+        standalone = not self.building
+        if standalone:
+            self.begin()
+        animation = self.animations[phase]
+        animation.setKeyValues(keyframes)
+        self.labels[phase].setAlignment(alignment)
+        if phase not in self.phases:
+            self.group.addAnimation(animation)
+        self.phases[phase] = {"text": text, "on_start": on_start, "on_finish": on_finish,
+                              "start": keyframes[0][1], "carried": ""}
+        if standalone:
+            self.start()
+
+    def start(self):
+        """Plays the queued phases of the current instruction."""
+        self.building = False
+        if self.group.animationCount():
+            self.group.start()
+
+    def finish(self):
+        """Completes a playing instruction at once, running all of its callbacks."""
+        if self.group.state() != QAbstractAnimation.Stopped:
+            self.group.setCurrentTime(self.group.totalDuration())
+
+    def cancel(self):
+        """Stops a playing instruction without running its remaining callbacks."""
+        self.group.stop()
+        self.phases.clear()
+        for label in self.labels.values():
+            label.hide()
+
+    def _phase_for(self, animation):
+        for phase, candidate in self.animations.items():
+            if candidate is animation:
+                return phase
+        return None
+
+    def _phase_started(self, animation):
+        phase = self._phase_for(animation)
+        spec = self.phases.get(phase)
+        if spec is None:
+            return
+        text = spec["text"]()
+        spec["carried"] = text
+        label = self.labels[phase]
+        if text.strip():
+            label.setText(text)
+            label.setGeometry(spec["start"])
+            label.raise_()
+            label.show()
+        if spec["on_start"]:
+            spec["on_start"]()
+
+    def _phase_finished(self, phase):
+        self.labels[phase].hide()  # Back to the pool
+        spec = self.phases.get(phase)
+        if spec and spec["on_finish"]:
+            spec["on_finish"](spec["carried"])
+
+    def _instruction_finished(self):
+        self.phases.clear()
@@ -0,0 +1,20 @@
+"""Loading and saving of the committed benchmark baseline files."""
+import json
+import os
+
+
+def load_baseline(file_path):
+    """Returns the stored baseline results, or an empty dict if there are none yet."""
+    if not os.path.exists(file_path):
+        return {}
+    with open(file_path, "r") as file:
+        return json.load(file)
+
+
+def save_baseline(file_path, results):
+    """Merges results into the baseline file, keeping entries that were not re-run."""
+    baseline = load_baseline(file_path)
+    baseline.update(results)
+    with open(file_path, "w") as file:
+        json.dump(dict(sorted(baseline.items())), file, indent=2)
+        file.write("\n")
@@ -0,0 +1,191 @@
+"""
+Engine throughput benchmarks for the headless CPU core.
+
+Runs per-instruction microbenchmarks for each instruction class, the bundled
+example programs and synthetic counting loops, reports instructions per second
+and latency per step, and compares the results with the committed baseline in
+``baseline_engine.json``. This measures the headless ``cpu.CPU``; the GUI's own
+execute_next_instruction/decode_and_execute path is timed by bench_gui.py.
+
+Usage (from the Simulator directory):
+    python benchmarks/bench_engine.py                  # run and compare
+    python benchmarks/bench_engine.py --update-baseline
+    python benchmarks/bench_engine.py -k loop          # only matching names
+"""
+import argparse
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SIMULATOR_DIR = os.path.dirname(HERE)
+sys.path.insert(0, SIMULATOR_DIR)
+
+from cache import CachedCPU, CachedWordCPU  # noqa: E402
+from cpu import CPU, MEMORY_SIZE, load_memory_file  # noqa: E402
+from isa import encode_memory  # noqa: E402
+from pipeline import PipelinedCPU  # noqa: E402
+from word_cpu import WordCPU  # noqa: E402
+from baseline import load_baseline, save_baseline  # noqa: E402
+
+BASELINE_FILE = os.path.join(HERE, "baseline_engine.json")
+MICRO_STEPS = 100000  # Instructions executed per microbenchmark run
+LOOP_COUNT = 20000  # Iterations of the synthetic loops
+
+
+def repeated_image(instruction, data=None):
+    """Fills cells 0-23 with one instruction followed by a JMP back to 0."""
+    memory = [""] * MEMORY_SIZE
+    for i in range(24):
+        memory[i] = instruction
+    memory[24] = "JMP 0"
+    memory[28] = "5"  # Operand for direct references
+    memory[29] = "28"  # Pointer for indirect references
+    memory[30] = "0"  # Scratch cell for stores
+    for index, value in (data or {}).items():
+        memory[index] = value
+    return memory
+
+
+def program_image(cells):
+    """Builds a memory image from an {address: word} mapping."""
+    memory = [""] * MEMORY_SIZE
+    for index, value in cells.items():
+        memory[index] = value
+    return memory
+
+
+# Each benchmark: name -> (memory factory, step limit or None to run to completion[, engine class])
+BENCHMARKS = {
+    # Memory reference, direct
+    "mri_direct_lda": (lambda: repeated_image("LDA 28"), MICRO_STEPS),
+    "mri_direct_add": (lambda: repeated_image("ADD 28"), MICRO_STEPS),
+    "mri_direct_str": (lambda: repeated_image("STR 30"), MICRO_STEPS),
+    "mri_direct_inc": (lambda: repeated_image("INC 30"), MICRO_STEPS),
+    # Memory reference, indirect
+    "mri_indirect_lda": (lambda: repeated_image("LDA I 29"), MICRO_STEPS),
+    "mri_indirect_add": (lambda: repeated_image("ADD I 29"), MICRO_STEPS),
+    "mri_indirect_str": (lambda: repeated_image("STR I 29"), MICRO_STEPS),
+    # Register reference
+    "rri_ina": (lambda: repeated_image("INA"), MICRO_STEPS),
+    "rri_clr": (lambda: repeated_image("CLR"), MICRO_STEPS),
+    "rri_cte": (lambda: repeated_image("CTE"), MICRO_STEPS),
+    # Input/Output
+    "io_out": (lambda: repeated_image("OUT"), MICRO_STEPS),
+    "io_inp": (lambda: repeated_image("INP 1"), MICRO_STEPS),
+    # Bundled programs, run to completion
+    "program_addition": (lambda: load_memory_file(os.path.join(SIMULATOR_DIR, "addition.txt")), None),
+    "program_subroutine": (lambda: load_memory_file(os.path.join(SIMULATOR_DIR, "SUBROUTINE.txt")), None),
+    "program_dma_copy": (lambda: load_memory_file(os.path.join(SIMULATOR_DIR, "dma_copy.txt")), None),
+    # Synthetic long loops
+    "loop_inc_jmp": (lambda: program_image({
+        0: "INC 30", 1: "JMP 0", 2: "HAL", 30: str(-LOOP_COUNT)}), None),
+    "loop_dec_jmp": (lambda: program_image({
+        0: "DEC 30", 1: "JMP 0", 2: "HAL", 30: str(LOOP_COUNT)}), None),
+    "loop_lda_jze_dec": (lambda: program_image({
+        0: "LDA 30", 1: "JZE 6", 2: "DEC 30", 3: "JMP 0", 4: "JMP 0", 6: "HAL", 30: str(LOOP_COUNT)}), None),
+    # The same images assembled to 16-bit words and run by WordCPU
+    "word_mri_direct_lda": (lambda: encode_memory(repeated_image("LDA 28")), MICRO_STEPS, WordCPU),
+    "word_mri_direct_inc": (lambda: encode_memory(repeated_image("INC 30")), MICRO_STEPS, WordCPU),
+    "word_mri_indirect_add": (lambda: encode_memory(repeated_image("ADD I 29")), MICRO_STEPS, WordCPU),
+    "word_rri_ina": (lambda: encode_memory(repeated_image("INA")), MICRO_STEPS, WordCPU),
+    "word_io_out": (lambda: encode_memory(repeated_image("OUT")), MICRO_STEPS, WordCPU),
+    "word_program_addition": (lambda: encode_memory(
+        load_memory_file(os.path.join(SIMULATOR_DIR, "addition.txt"))), None, WordCPU),
+    "word_loop_lda_jze_dec": (lambda: encode_memory(program_image({
+        0: "LDA 30", 1: "JZE 6", 2: "DEC 30", 3: "JMP 0", 4: "JMP 0", 6: "HAL", 30: str(LOOP_COUNT)})), None, WordCPU),
+    # Subroutine calls: JSA with the return address in memory against the hardware stack
+    "call_jsa_jmp_i": (lambda: program_image({
+        0: "JSA 10", 1: "JMP 0", 10: "0", 11: "INA", 12: "JMP I 10"}), MICRO_STEPS),
+    "call_stack_ret": (lambda: program_image({0: "CALL 10", 1: "JMP 0", 10: "INA", 11: "RET"}), MICRO_STEPS),
+    "call_push_pop": (lambda: program_image({0: "PUSH", 1: "POP", 2: "JMP 0"}), MICRO_STEPS),
+    "word_call_stack_ret": (lambda: encode_memory(program_image({
+        0: "CALL 10", 1: "JMP 0", 10: "INA", 11: "RET"})), MICRO_STEPS, WordCPU),
+    # Images with every memory reference going through the default cache model
+    "cache_mri_direct_lda": (lambda: repeated_image("LDA 28"), MICRO_STEPS, CachedCPU),
+    "cache_mri_direct_inc": (lambda: repeated_image("INC 30"), MICRO_STEPS, CachedCPU),
+    "cache_mri_indirect_add": (lambda: repeated_image("ADD I 29"), MICRO_STEPS, CachedCPU),
+    "cache_loop_lda_jze_dec": (lambda: program_image({
+        0: "LDA 30", 1: "JZE 6", 2: "DEC 30", 3: "JMP 0", 4: "JMP 0", 6: "HAL", 30: str(LOOP_COUNT)}), None, CachedCPU),
+    "cache_program_addition": (lambda: load_memory_file(os.path.join(SIMULATOR_DIR, "addition.txt")), None,
+                               CachedCPU),
+    "cache_word_mri_direct_inc": (lambda: encode_memory(repeated_image("INC 30")), MICRO_STEPS, CachedWordCPU),
+    # Text images with every instruction accounted for by the pipeline model
+    "pipeline_mri_indirect_add": (lambda: repeated_image("ADD I 29"), MICRO_STEPS, PipelinedCPU),
+    "pipeline_loop_lda_jze_dec": (lambda: program_image({
+        0: "LDA 30", 1: "JZE 6", 2: "DEC 30", 3: "JMP 0", 4: "JMP 0", 6: "HAL", 30: str(LOOP_COUNT)}), None, PipelinedCPU),
+}
+
+
+def run_benchmark(factory, max_steps, engine=CPU, min_time=0.2):
+    """Runs one benchmark repeatedly for at least min_time seconds; returns (steps, seconds)."""
+    cpu = engine()
+    total_steps = 0
+    elapsed = 0.0
+    while elapsed < min_time:
+        cpu.reset(factory())
+        start = time.perf_counter()
+        total_steps += cpu.run(max_steps)
+        elapsed += time.perf_counter() - start
+    return total_steps, elapsed
+
+
+def measure(names, repeat):
+    """Returns {name: {"ips": ..., "ns_per_step": ...}} using the best of repeat runs."""
+    results = {}
+    # Untimed warm-up so the first benchmarks are not measured on a cold interpreter/CPU
+    for name in names:
+        run_benchmark(*BENCHMARKS[name], min_time=0.05)
+    for name in names:
+        best = None
+        for _ in range(repeat):
+            steps, seconds = run_benchmark(*BENCHMARKS[name])
+            ips = steps / seconds
+            if best is None or ips > best:
+                best = ips
+        results[name] = {"ips": round(best), "ns_per_step": round(1e9 / best, 1)}
+    return results
+
+
+def report(results, baseline, tolerance):
+    """Prints a results table; returns the names that regressed past tolerance."""
+    regressions = []
+    print(f"{'benchmark':<26}{'instr/s':>14}{'ns/step':>11}{'baseline':>14}{'change':>9}")
+    for name, result in results.items():
+        line = f"{name:<26}{result['ips']:>14,}{result['ns_per_step']:>11}"
+        base = baseline.get(name)
+        if base:
+            change = result["ips"] / base["ips"] - 1
+            line += f"{base['ips']:>14,}{change:>+9.1%}"
+            if change < -tolerance:
+                line += "  REGRESSION"
+                regressions.append(name)
+        print(line)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the headless CPU engine.")
+    parser.add_argument("-k", dest="pattern", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark; the best is kept")
+    parser.add_argument("--tolerance", type=float, default=0.3,
+                        help="allowed slowdown against the baseline before failing (fraction)")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the new baseline")
+    args = parser.parse_args(argv)
+
+    names = [name for name in BENCHMARKS if args.pattern in name]
+    results = measure(names, args.repeat)
+    regressions = report(results, load_baseline(BASELINE_FILE), args.tolerance)
+
+    if args.update_baseline:
+        save_baseline(BASELINE_FILE, results)
+        print(f"Baseline updated: {BASELINE_FILE}")
+        return 0
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
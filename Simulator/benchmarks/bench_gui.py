@@ -0,0 +1,298 @@
+"""
+Offscreen GUI rendering benchmarks for the animation and repaint paths.
+
+Drives ProcessorSimulator under Qt's offscreen platform through scripted
+scenarios and records frame-time percentiles (p50/p90/p99, in milliseconds)
+for widget creation, animation setup, animation frames, the mnemonic/binary
+toggle and the full-repaint loop in load_memory. It also steps programs and
+per-class instruction images through execute_next_instruction, the GUI's own
+fetch/decode/execute path, which bench_engine.py does not cover. Results are
+compared with the committed ``baseline_gui.json``.
+
+Usage (from the Simulator directory):
+    python benchmarks/bench_gui.py
+    python benchmarks/bench_gui.py --update-baseline
+    python benchmarks/bench_gui.py -k toggle
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SIMULATOR_DIR = os.path.dirname(HERE)
+sys.path.insert(0, SIMULATOR_DIR)
+os.chdir(SIMULATOR_DIR)  # ProcessorSimulator loads its .ui file by relative path
+
+from PyQt5.QtCore import Qt, qInstallMessageHandler  # noqa: E402
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+import simulator  # noqa: E402
+from baseline import load_baseline, save_baseline  # noqa: E402
+from bench_engine import repeated_image  # noqa: E402
+from cpu import MEMORY_SIZE, load_memory_file  # noqa: E402
+
+BASELINE_FILE = os.path.join(HERE, "baseline_gui.json")
+ANIMATION_FRAMES = 20  # Frames rendered per animation (one per 1/20 of its duration)
+EXECUTE_STEPS = 50  # Instructions stepped per execute round
+
+
+def full_image():
+    """A memory image with every cell in use, alternating instructions and data."""
+    memory = []
+    for i in range(MEMORY_SIZE):
+        memory.append(f"ADD I {31 - i}" if i % 2 == 0 else str(i))
+    return memory
+
+
+# Scripted scenarios: name -> memory image loaded into the window
+SCENARIOS = {
+    "addition": lambda: load_memory_file(os.path.join(SIMULATOR_DIR, "addition.txt")),
+    "subroutine": lambda: load_memory_file(os.path.join(SIMULATOR_DIR, "SUBROUTINE.txt")),
+    "full_memory": full_image,
+}
+
+# Instruction-class images stepped through execute_next_instruction: name -> memory image
+EXECUTE_IMAGES = {
+    "execute_mri_direct": lambda: repeated_image("ADD 28"),
+    "execute_mri_indirect": lambda: repeated_image("ADD I 29"),
+    "execute_rri": lambda: repeated_image("INA"),
+    "execute_io": lambda: repeated_image("OUT"),
+}
+
+
+# Measurements each benchmark stage records, relative to its scenario name; -k skips stages with no match
+ANIMATIONS = ("memory_to_ac", "memory_to_ir_animation", "ac_to_memory_animation")
+STAGE_MEASUREMENTS = {
+    "window_creation": ("window_creation",),
+    "animations": tuple(f"{name}.{part}" for name in ANIMATIONS for part in ("setup", "frame", "finish")),
+    "toggle": ("toggle_mnemonic_view.on", "toggle_mnemonic_view.off"),
+    "load_memory": ("load_memory",),
+    "execute": ("execute_step",),
+}
+
+
+def selected_stages(scenario, pattern, stages=STAGE_MEASUREMENTS):
+    """The stages of a scenario that record at least one measurement containing pattern."""
+    return {stage for stage, measurements in stages.items()
+            if any(pattern in f"{scenario}.{measurement}" for measurement in measurements)}
+
+
+class Recorder:
+    """Collects per-operation timings and reduces them to percentiles."""
+
+    def __init__(self):
+        self.samples = {}
+
+    @contextlib.contextmanager
+    def time(self, name):
+        start = time.perf_counter()
+        yield
+        self.samples.setdefault(name, []).append((time.perf_counter() - start) * 1000)
+
+    def percentiles(self):
+        results = {}
+        for name, values in self.samples.items():
+            values = sorted(values)
+            results[name] = {
+                "p50": round(percentile(values, 50), 3),
+                "p90": round(percentile(values, 90), 3),
+                "p99": round(percentile(values, 99), 3),
+                "samples": len(values),
+            }
+        return results
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def fill_memory(window, memory):
+    for i, line_edit in enumerate(window.memAddr_inputs):
+        line_edit.setText(memory[i])
+    window.AC = 7
+    window.ac_input.setText(str(window.AC))
+
+
+def play_animation(window, recorder, prefix):
+    """Renders the transfer animation group frame by frame, then finishes it."""
+    animation = window.animator.group
+    duration = animation.totalDuration()
+    for frame in range(1, ANIMATION_FRAMES):
+        with recorder.time(f"{prefix}.frame"):
+            animation.setCurrentTime(duration * frame // ANIMATION_FRAMES)
+            window.repaint()
+    with recorder.time(f"{prefix}.finish"):
+        animation.setCurrentTime(duration)  # Emits finished and runs the completion callback
+        QApplication.processEvents()  # Deliver the queued widget updates
+
+
+def bench_animations(window, recorder, scenario):
+    for index, value in enumerate(window.memory):
+        if not value:
+            continue
+        for name in ANIMATIONS:
+            method = getattr(window, name)
+            prefix = f"{scenario}.{name}"
+            with recorder.time(f"{prefix}.setup"):
+                method(index)
+            play_animation(window, recorder, prefix)
+
+
+def bench_toggle(window, recorder, scenario, rounds):
+    for _ in range(rounds):
+        with recorder.time(f"{scenario}.toggle_mnemonic_view.on"):
+            window.tggl_mnemonic.setCheckState(Qt.Checked)
+            window.repaint()
+        with recorder.time(f"{scenario}.toggle_mnemonic_view.off"):
+            window.tggl_mnemonic.setCheckState(Qt.Unchecked)
+            QApplication.processEvents()
+            window.repaint()
+
+
+def bench_load_memory(window, recorder, scenario, memory, rounds):
+    """Times load_memory end to end with the file and message dialogs answered automatically."""
+    fd, path = tempfile.mkstemp(suffix=".txt")
+    os.close(fd)
+    with open(path, "w") as file:
+        for i, value in enumerate(memory):
+            file.write(f"{i}:{value}\n")
+
+    original_open = simulator.QFileDialog.getOpenFileName
+    original_information = simulator.QMessageBox.information
+    simulator.QFileDialog.getOpenFileName = staticmethod(lambda *args, **kwargs: (path, ""))
+    simulator.QMessageBox.information = staticmethod(lambda *args, **kwargs: None)
+    try:
+        for _ in range(rounds):
+            with recorder.time(f"{scenario}.load_memory"):
+                window.load_memory()
+    finally:
+        simulator.QFileDialog.getOpenFileName = original_open
+        simulator.QMessageBox.information = original_information
+        os.remove(path)
+
+
+def bench_execute(window, recorder, scenario, memory, rounds):
+    """Times execute_next_instruction plus the completion of its animations, one step at a time."""
+    window.show_popup = lambda *args: None  # HAL would open a modal message box
+    for _ in range(rounds):
+        fill_memory(window, memory)
+        window.PC = 0
+        window.running = True
+        for _ in range(EXECUTE_STEPS):
+            if not window.running or window.PC >= len(window.memory) or not window.memory[window.PC]:
+                break
+            with recorder.time(f"{scenario}.execute_step"):
+                window.execute_next_instruction()
+                window.animator.finish()
+                QApplication.processEvents()
+
+
+def run(pattern, rounds):
+    qInstallMessageHandler(lambda *args: None)  # Offscreen plugin and stylesheet warnings
+    app = QApplication.instance() or QApplication(sys.argv)
+    recorder = Recorder()
+
+    for scenario, factory in SCENARIOS.items():
+        stages = selected_stages(scenario, pattern)
+        if not stages:
+            continue
+        memory = factory()
+
+        if "window_creation" in stages:
+            for _ in range(rounds):
+                with recorder.time(f"{scenario}.window_creation"):
+                    window = simulator.ProcessorSimulator()
+                    window.show()
+                    QApplication.processEvents()
+                window.close()
+                window.deleteLater()
+                QApplication.processEvents()
+        if stages == {"window_creation"}:
+            continue
+
+        window = simulator.ProcessorSimulator()
+        window.show()
+        fill_memory(window, memory)
+        QApplication.processEvents()
+
+        if "animations" in stages:
+            bench_animations(window, recorder, scenario)
+        if "toggle" in stages:
+            bench_toggle(window, recorder, scenario, rounds)
+        if "load_memory" in stages:
+            bench_load_memory(window, recorder, scenario, memory, rounds)
+        if "execute" in stages:
+            bench_execute(window, recorder, scenario, memory, rounds)
+
+        window.close()
+        window.deleteLater()
+        QApplication.processEvents()
+
+    images = {name: factory for name, factory in EXECUTE_IMAGES.items()
+              if selected_stages(name, pattern, {"execute": STAGE_MEASUREMENTS["execute"]})}
+    if images:
+        window = simulator.ProcessorSimulator()
+        window.show()
+        for name, factory in images.items():
+            bench_execute(window, recorder, name, factory(), rounds)
+        window.close()
+        window.deleteLater()
+        QApplication.processEvents()
+
+    app.processEvents()
+    # A stage records several measurements; keep only the matching ones
+    results = recorder.percentiles()
+    return {name: value for name, value in results.items() if pattern in name}
+
+
+def report(results, baseline, tolerance):
+    """Prints a percentile table; returns the names whose p50 regressed past tolerance."""
+    regressions = []
+    print(f"{'measurement':<52}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'n':>6}{'base p50':>10}")
+    for name, result in results.items():
+        line = f"{name:<52}{result['p50']:>9}{result['p90']:>9}{result['p99']:>9}{result['samples']:>6}"
+        base = baseline.get(name)
+        if base:
+            line += f"{base['p50']:>10}"
+            # Sub-0.1 ms timings are dominated by timer noise, so they never count as regressions
+            if result["p50"] > 0.1 and result["p50"] > base["p50"] * (1 + tolerance):
+                line += "  REGRESSION"
+                regressions.append(name)
+        print(line)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark GUI animation and repaint paths offscreen.")
+    parser.add_argument("-k", dest="pattern", default="", help="only run and report measurements containing this")
+    parser.add_argument("--rounds", type=int, default=10, help="repetitions of the creation/toggle/load scenarios")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="allowed p50 slowdown against the baseline before failing (fraction)")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the new baseline")
+    args = parser.parse_args(argv)
+
+    # The simulator prints on every transfer; keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = run(args.pattern, args.rounds)
+    regressions = report(results, load_baseline(BASELINE_FILE), args.tolerance)
+
+    if args.update_baseline:
+        save_baseline(BASELINE_FILE, results)
+        print(f"Baseline updated: {BASELINE_FILE}")
+        return 0
+    if regressions:
+        print(f"{len(regressions)} measurement(s) regressed: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""
+Cache hierarchy model between the CPU and memory.
+
+A CacheHierarchy is a list of cache levels (L1 first) in front of main
+memory. Each level is direct mapped (``ways=1``) or set associative, with a
+configurable size and line size in words, LRU or FIFO replacement, and a
+write-back (write-allocate) or write-through (no-write-allocate) policy.
+Line size and set count are powers of two, so the set index and tag are
+shifts and masks of the address.
+The model only tracks which lines each level holds and counts cycles. Data
+always lives in CPU memory, so results are identical with and without a
+cache.
+
+CachedCPU and CachedWordCPU send every instruction fetch, operand read,
+indirect address lookup and store through the hierarchy. They add its
+latency to a cycle count (one execute cycle per instruction plus memory
+time). DMA transfers use memory directly and bypass the cache.
+
+Usage (from the Simulator directory):
+    python cache.py addition.txt --size 8 --line-size 2 --ways 2 --replacement fifo
+"""
+import argparse
+
+from cpu import CPU, load_memory_file
+from word_cpu import WordCPU
+
+REPLACEMENT_POLICIES = ("lru", "fifo")
+WRITE_POLICIES = ("write-back", "write-through")
+DEFAULT_MEMORY_CYCLES = 10
+
+
+class Cache:
+    """One cache level; each set maps line number -> dirty flag, oldest entry first."""
+
+    def __init__(self, size=16, line_size=2, ways=1, replacement="lru", write_policy="write-back",
+                 hit_cycles=1, name="L1"):
+        if size <= 0 or line_size <= 0 or ways <= 0 or size % (line_size * ways):
+            raise ValueError(f"{name}: size {size} is not a multiple of line size x ways ({line_size} x {ways})")
+        num_sets = size // (line_size * ways)
+        if line_size & (line_size - 1) or num_sets & (num_sets - 1):
+            raise ValueError(f"{name}: line size {line_size} and number of sets {num_sets} must be powers of two")
+        if replacement not in REPLACEMENT_POLICIES:
+            raise ValueError(f"{name}: unknown replacement policy '{replacement}'")
+        if write_policy not in WRITE_POLICIES:
+            raise ValueError(f"{name}: unknown write policy '{write_policy}'")
+        self.name = name
+        self.size = size
+        self.line_size = line_size
+        self.ways = ways
+        self.replacement = replacement
+        self.write_policy = write_policy
+        self.hit_cycles = hit_cycles
+        self.num_sets = num_sets
+        # line = address >> offset_bits, set index = line & set_mask; the line number is the tag kept per set
+        self.offset_bits = line_size.bit_length() - 1
+        self.set_mask = self.num_sets - 1
+        self.lru = replacement == "lru"
+        self.reorder = self.lru and ways > 1  # A set of one line has no use order to keep
+        self.write_back = write_policy == "write-back"
+        self.reset()
+
+    def reset(self):
+        """Empties the cache and clears its counters."""
+        self.sets = [{} for _ in range(self.num_sets)]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.writebacks = 0  # Dirty lines written to the next level on eviction
+
+    def stats(self):
+        accesses = self.hits + self.misses
+        return {
+            "name": self.name, "hits": self.hits, "misses": self.misses,
+            "hit_rate": self.hits / accesses if accesses else 0.0,
+            "miss_rate": self.misses / accesses if accesses else 0.0,
+            "evictions": self.evictions, "writebacks": self.writebacks,
+        }
+
+
+class CacheHierarchy:
+    """Cache levels in front of main memory, with cycle accounting."""
+
+    def __init__(self, levels=None, memory_cycles=DEFAULT_MEMORY_CYCLES):
+        self.levels = list(levels) if levels is not None else [Cache()]
+        if not self.levels:
+            raise ValueError("A cache hierarchy needs at least one level")
+        self.memory_cycles = memory_cycles
+        self.reset()
+
+    def reset(self):
+        """Empties every level and clears all counters."""
+        for level in self.levels:
+            level.reset()
+        self.reads = 0
+        self.writes = 0
+        self.cycles = 0  # Cycles spent on memory references
+        self.memory_accesses = 0  # References that reached main memory, including writebacks
+
+    def access(self, address, write=False):
+        """Performs one CPU reference to address; returns the cycles it took."""
+        first = self.levels[0]
+        line = address >> first.offset_bits
+        entries = first.sets[line & first.set_mask]
+        if line in entries and (first.write_back or not write):
+            # L1 hit that needs nothing from the levels below, handled without walking the hierarchy
+            if write:
+                self.writes += 1
+            else:
+                self.reads += 1
+            first.hits += 1
+            if first.reorder:
+                entries[line] = entries.pop(line) or write  # Most recently used goes last
+            elif write:
+                entries[line] = True
+            self.cycles += first.hit_cycles
+            return first.hit_cycles
+        if write:
+            self.writes += 1
+        else:
+            self.reads += 1
+        cycles = self._access(0, address, write)
+        self.cycles += cycles
+        return cycles
+
+    def _access(self, index, address, write):
+        if index == len(self.levels):
+            self.memory_accesses += 1
+            return self.memory_cycles
+        level = self.levels[index]
+        cycles = level.hit_cycles
+        line = address >> level.offset_bits
+        entries = level.sets[line & level.set_mask]
+        if line in entries:
+            level.hits += 1
+            if level.reorder:
+                entries[line] = entries.pop(line)  # Most recently used goes last
+        else:
+            level.misses += 1
+            if write and not level.write_back:
+                return cycles + self._access(index + 1, address, True)  # No-write-allocate
+            cycles += self._access(index + 1, address, False)  # Fill the line from the level below
+            if len(entries) >= level.ways:
+                victim = next(iter(entries))  # Least recently used (LRU) or oldest (FIFO)
+                level.evictions += 1
+                if entries.pop(victim):
+                    level.writebacks += 1
+                    cycles += self._access(index + 1, victim << level.offset_bits, True)
+            entries[line] = False
+        if write:
+            if level.write_back:
+                entries[line] = True
+            else:
+                cycles += self._access(index + 1, address, True)
+        return cycles
+
+    def report(self):
+        """Hit/miss statistics per level and the cycle impact against uncached memory."""
+        references = self.reads + self.writes
+        uncached = references * self.memory_cycles
+        return {
+            "levels": [level.stats() for level in self.levels],
+            "reads": self.reads, "writes": self.writes,
+            "memory_accesses": self.memory_accesses,
+            "cycles": self.cycles, "uncached_cycles": uncached,
+            "cycles_per_reference": self.cycles / references if references else 0.0,
+            "speedup": uncached / self.cycles if self.cycles else 1.0,
+        }
+
+
+class CachedCPU(CPU):
+    """CPU whose memory references go through a CacheHierarchy."""
+
+    cacheable = False  # A cached result would skip the hit/miss and cycle counting
+
+    def __init__(self, memory=None, hierarchy=None):
+        super().__init__(memory)
+        self.hierarchy = hierarchy if hierarchy is not None else CacheHierarchy()
+        # Bound once, so the per-reference path makes no super() or attribute lookups
+        self._access = self.hierarchy.access
+        self._memory_read = super().read
+        self._memory_write = super().write
+
+    def reset(self, memory=None):
+        super().reset(memory)
+        self.hierarchy.reset()
+
+    @property
+    def cycles(self):
+        """One execute cycle per instruction plus the memory latency counted by the hierarchy."""
+        return self.steps + self.hierarchy.cycles
+
+    def fetch(self, address):
+        self._access(address)
+        return self.memory[address]  # Same as CPU.fetch, without the extra call on every step
+
+    def read(self, address):
+        self._access(address)
+        return self._memory_read(address)
+
+    def write(self, address, value):
+        self._access(address, True)
+        self._memory_write(address, value)
+
+    def _fast_forward_counting_loop(self, budget):
+        return 0  # Skipped iterations would never reach the cache, so every step is executed
+
+    def report(self):
+        """Cache statistics plus total cycles and cycles per instruction for this run."""
+        report = self.hierarchy.report()
+        report["steps"] = self.steps
+        report["total_cycles"] = self.cycles
+        report["cpi"] = self.cycles / self.steps if self.steps else 0.0
+        return report
+
+
+class CachedWordCPU(CachedCPU, WordCPU):
+    """WordCPU whose memory references go through a CacheHierarchy."""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a memory image through a cache model and report hit rates.")
+    parser.add_argument("file", help="memory file (index:value per line)")
+    parser.add_argument("--size", type=int, default=16, help="L1 size in words")
+    parser.add_argument("--line-size", type=int, default=2, help="words per line")
+    parser.add_argument("--ways", type=int, default=1, help="associativity (1 = direct mapped)")
+    parser.add_argument("--replacement", choices=REPLACEMENT_POLICIES, default="lru")
+    parser.add_argument("--write-policy", choices=WRITE_POLICIES, default="write-back")
+    parser.add_argument("--hit-cycles", type=int, default=1)
+    parser.add_argument("--l2-size", type=int, default=0, help="add an L2 of this many words (same policies)")
+    parser.add_argument("--l2-ways", type=int, default=4)
+    parser.add_argument("--l2-hit-cycles", type=int, default=4)
+    parser.add_argument("--memory-cycles", type=int, default=DEFAULT_MEMORY_CYCLES)
+    parser.add_argument("--max-steps", type=int, default=100000)
+    args = parser.parse_args()
+
+    levels = [Cache(args.size, args.line_size, args.ways, args.replacement, args.write_policy, args.hit_cycles, "L1")]
+    if args.l2_size:
+        levels.append(Cache(args.l2_size, args.line_size, args.l2_ways, args.replacement, args.write_policy,
+                            args.l2_hit_cycles, "L2"))
+    cpu = CachedCPU(load_memory_file(args.file), CacheHierarchy(levels, args.memory_cycles))
+    cpu.run(args.max_steps)
+
+    report = cpu.report()
+    for level in report["levels"]:
+        print(f"{level['name']}: hits={level['hits']} misses={level['misses']} hit rate={level['hit_rate']:.1%} "
+              f"evictions={level['evictions']} writebacks={level['writebacks']}")
+    print(f"references: {report['reads']} reads, {report['writes']} writes, "
+          f"{report['memory_accesses']} reached memory")
+    print(f"memory cycles: {report['cycles']} (uncached {report['uncached_cycles']}, "
+          f"speedup {report['speedup']:.2f}x)")
+    print(f"steps: {report['steps']}, total cycles: {report['total_cycles']}, CPI: {report['cpi']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,465 @@
+"""
+Headless CPU core for the 16-bit processor simulator.
+
+Executes the same mnemonic memory images as ProcessorSimulator (``0:LDA 16``
+style files) without any Qt widgets or animations, so programs can be run,
+benchmarked and scripted outside the GUI.
+"""
+
+from dma import DMAController
+from loop_detector import LoopDetector
+from stack import HardwareStack
+
+MEMORY_SIZE = 32
+
+# Instructions that take a memory address (direct or ``I`` indirect)
+MEMORY_REFERENCE = {
+    "LDA", "STR", "JMP", "JZE", "JSA", "AND", "OR", "XOR",
+    "ADD", "SUB", "MUL", "DIV", "INC", "DEC", "CALL"
+}
+
+
+def parse_memory(lines, size=MEMORY_SIZE):
+    """Builds a memory list from ``index:value`` lines, skipping invalid ones."""
+    memory = [""] * size
+    for line in lines:
+        line = line.strip()
+        if ":" in line:
+            try:
+                index, value = line.split(":", 1)
+                index = int(index.strip())
+                if 0 <= index < size:
+                    memory[index] = value.strip()
+            except ValueError:
+                pass
+    return memory
+
+
+def load_memory_file(file_path, size=MEMORY_SIZE):
+    """Reads a saved memory file (``index:value`` per line) into a memory list."""
+    with open(file_path, "r") as file:
+        return parse_memory(file, size)
+
+
+def save_memory_file(file_path, memory):
+    """Writes a memory list in the format read by load_memory_file."""
+    with open(file_path, "w") as file:
+        for i, value in enumerate(memory):
+            file.write(f"{i}:{value}\n")
+
+
+def loop_state(machine):
+    """Everything that influences the next instructions of a CPU or ProcessorSimulator.
+
+    AR and IR are left out because every fetch recomputes them.
+    """
+    return (machine.PC, machine.AC, machine.E, tuple(machine.memory), len(machine.input_stream),
+            tuple(machine.dma.registers), machine.dma.selected, machine.dma.result, machine.dma.done,
+            tuple(machine.stack.words))
+
+
+def fast_forward_counting_loop(machine, budget=None, write=None):
+    """Jumps over full iterations of ``p: INC/DEC x`` / ``p+1: JMP p`` at machine.PC.
+
+    Works on any machine with a mnemonic memory list and AC/IR/AR registers, such as a CPU or
+    ProcessorSimulator; the counter is stored with write(address, value), or directly into
+    memory without it. Every full iteration is an INC/DEC that does not reach zero followed by
+    the JMP back, so n iterations add n (or -n) to the counter; the final, skipping INC/DEC is
+    left to run normally. At most budget steps are skipped. Returns (steps skipped, loop), where
+    loop describes a counter that moves away from zero, so that nothing can stop the loop, and
+    is None otherwise.
+    """
+    pc = machine.PC
+    memory = machine.memory
+    if pc + 1 >= len(memory):
+        return 0, None
+    parts = memory[pc].split()
+    if len(parts) != 2 or parts[0] not in ("INC", "DEC") or memory[pc + 1].split() != ["JMP", str(pc)]:
+        return 0, None
+    try:
+        counter = int(parts[1])
+        value = int(memory[counter])
+    except (ValueError, IndexError):
+        return 0, None  # Let normal execution report the problem
+    if counter in (pc, pc + 1):
+        return 0, None  # Self-modifying loop
+
+    direction = 1 if parts[0] == "INC" else -1
+    iterations = -value * direction  # Steps of the counter until it reaches zero
+    if iterations <= 0:
+        return 0, {"length": 2, "addresses": [pc, pc + 1], "pc": pc, "diverges": True}
+
+    full = iterations - 1
+    if budget is not None:
+        full = min(full, budget // 2)
+    if full <= 0:
+        return 0, None
+    value += direction * full
+    if write is None:
+        memory[counter] = str(value)
+    else:
+        write(counter, value)
+    machine.AC = value
+    machine.IR = memory[pc + 1]
+    machine.AR = pc  # As left by the last JMP
+    return 2 * full, None
+
+
+class CPU:
+    """Accumulator machine with the registers and instruction set of ProcessorSimulator."""
+
+    cacheable = True  # snapshot() holds everything a run changes, so run_cached may reuse results
+
+    # Mnemonic -> name of its handler method
+    HANDLERS = {
+        "LDA": "_lda", "STR": "_str", "JMP": "_jmp", "JZE": "_jze",
+        "JSA": "_jsa", "AND": "_and", "OR": "_or", "XOR": "_xor",
+        "ADD": "_add", "SUB": "_sub", "MUL": "_mul", "DIV": "_div",
+        "INC": "_inc", "DEC": "_dec", "CMP": "_nop",
+        "CLR": "_clr", "CRE": "_cre", "CTA": "_cta", "CTE": "_cte",
+        "SKZ": "_skz", "INA": "_ina", "SKP": "_skp", "SKN": "_skn",
+        "CRA": "_cra", "CLA": "_cla", "HAL": "_hal",
+        "INP": "_inp", "OUT": "_out", "SFI": "_nop", "SFO": "_sfo",
+        "PUT": "_put", "OPT": "_opt", "SPI": "_spi", "SPO": "_spo",
+        "SIE": "_nop",
+        "CALL": "_call", "RET": "_ret", "PUSH": "_push", "POP": "_pop"
+    }
+
+    def __init__(self, memory=None):
+        # Memory and Registers
+        self.memory = memory if memory is not None else [""] * MEMORY_SIZE
+        self.AC = 0  # Accumulator
+        self.PC = 0  # Program Counter
+        self.IR = ""  # Instruction Register
+        self.E = 0
+        self.AR = 0
+
+        # Execution Control
+        self.running = False
+        self.halted = False
+        self.steps = 0
+        self.loop = None  # Set by run(detect_loops=True) when the program cannot finish
+        self.at_breakpoint = False  # Set when run() stopped in front of a breakpoint
+
+        # Simulated I/O: values consumed by INP and values produced by OUT
+        self.input_stream = []
+        self.output = []
+        self.dma = DMAController()  # Programmed through PUT/OPT/SPI/SPO
+        self.stack = HardwareStack()  # Used by CALL/RET/PUSH/POP; SP is self.stack.SP
+
+        # Mnemonic -> handler, called with the effective address in AR
+        self.handlers = {mnemonic: getattr(self, name) for mnemonic, name in self.HANDLERS.items()}
+
+    def reset(self, memory=None):
+        """Clears registers and flags, optionally replacing memory."""
+        if memory is not None:
+            self.memory = memory
+        self.AC = 0
+        self.PC = 0
+        self.IR = ""
+        self.E = 0
+        self.AR = 0
+        self.running = False
+        self.halted = False
+        self.steps = 0
+        self.loop = None
+        self.at_breakpoint = False
+        self.output = []
+        self.dma.reset()
+        self.stack.reset()
+
+    def snapshot(self):
+        """Returns the complete machine state as plain, JSON-serialisable data."""
+        return {
+            "memory": list(self.memory),
+            "AC": self.AC, "PC": self.PC, "IR": self.IR, "E": self.E, "AR": self.AR,
+            "halted": self.halted, "steps": self.steps,
+            "input_stream": list(self.input_stream), "output": list(self.output),
+            "dma": self.dma.state(),
+            "stack": list(self.stack.words),
+        }
+
+    def restore(self, state):
+        """Loads a state produced by snapshot(); memory is updated in place."""
+        for i, value in enumerate(state["memory"]):
+            self.memory[i] = value
+        self.AC = state["AC"]
+        self.PC = state["PC"]
+        self.IR = state["IR"]
+        self.E = state["E"]
+        self.AR = state["AR"]
+        self.halted = state["halted"]
+        self.steps = state["steps"]
+        self.running = False
+        self.loop = None  # As left by a run that did not stop on a loop or a breakpoint
+        self.at_breakpoint = False
+        self.input_stream = list(state["input_stream"])
+        self.output = list(state["output"])
+        self.dma.load_state(state["dma"])
+        self.stack.words = list(state.get("stack", []))  # Absent in snapshots from before the stack
+
+    # Memory access -- every fetch, operand read and write goes through these
+    def fetch(self, address):
+        """Returns the instruction word at address."""
+        return self.memory[address]
+
+    def read(self, address):
+        """Returns the numeric value stored at address."""
+        return int(self.memory[address])
+
+    def write(self, address, value):
+        """Stores a numeric value at address."""
+        self.memory[address] = str(value)
+
+    def execute_next_instruction(self):
+        """Executes the instruction at the current PC."""
+        if self.PC >= len(self.memory):
+            self.running = False
+            return
+        instruction = self.fetch(self.PC)
+        if not instruction:
+            # Nothing left to execute; the GUI would spin here forever
+            self.running = False
+            return
+
+        self.IR = instruction
+        components = instruction.split(maxsplit=2)
+        if len(components) == 1:
+            command, add_bit, operand = components[0], None, None
+            self.AR = self.PC
+        elif len(components) == 2:
+            command, operand = components
+            add_bit = None
+            self.AR = int(operand)
+        else:
+            command, add_bit, operand = components
+            self.AR = self.read(int(operand))  # Indirect: AR takes the pointer's value
+
+        self.decode_and_execute(command, add_bit, operand)
+        self.steps += 1
+
+        if self.halted:
+            return  # HAL leaves PC on the halting instruction
+        self.PC += 1
+
+    def decode_and_execute(self, command, add_bit, operand):
+        """Decodes and executes the given mnemonic; AR must hold the effective address."""
+        handler = self.handlers.get(command)
+        if handler is None:
+            return  # Data words and unknown mnemonics execute as no-ops
+        if operand is None and command in MEMORY_REFERENCE:
+            return
+        handler(operand)
+
+    def run(self, max_steps=None, detect_loops=False, breakpoints=None):
+        """Runs until HAL, an empty cell, or max_steps instructions; returns the steps executed.
+
+        With detect_loops, a repeated machine state or a counting loop that can never exit stops
+        the run and is described in self.loop, and INC/DEC counting loops are fast-forwarded.
+        With breakpoints, the run stops before executing any of those addresses (other than the
+        first instruction, so a run can resume from a breakpoint) and sets self.at_breakpoint.
+        """
+        self.running = True
+        self.loop = None
+        self.at_breakpoint = False
+        start = self.steps
+        if detect_loops:
+            self._run_detecting_loops(start, max_steps, breakpoints)
+        elif breakpoints:
+            while self.running:
+                if max_steps is not None and self.steps - start >= max_steps:
+                    break
+                if self.PC in breakpoints and self.steps != start:
+                    self.at_breakpoint = True
+                    break
+                self.execute_next_instruction()
+        else:
+            while self.running:
+                if max_steps is not None and self.steps - start >= max_steps:
+                    break
+                self.execute_next_instruction()
+        self.running = False
+        return self.steps - start
+
+    def _run_detecting_loops(self, start, max_steps, breakpoints=None):
+        detector = LoopDetector()
+        breakpoints = breakpoints or ()
+        while self.running:
+            budget = None if max_steps is None else max_steps - (self.steps - start)
+            if budget == 0:
+                break
+            if self.PC in breakpoints and self.steps != start:
+                self.at_breakpoint = True
+                break
+            if self.PC not in breakpoints and self.PC + 1 not in breakpoints \
+                    and self._fast_forward_counting_loop(budget):
+                detector.reset()
+                continue
+            if self.loop:
+                break
+            self.execute_next_instruction()
+            if not self.running:
+                break  # HAL or an empty cell
+            cycle = detector.check(self._loop_state(), self.PC)
+            if cycle:
+                self.loop = dict(cycle, pc=self.PC, step=self.steps, diverges=False)
+                self.running = False
+
+    def _loop_state(self):
+        return loop_state(self)
+
+    def _fast_forward_counting_loop(self, budget):
+        """Jumps over full iterations of an INC/DEC counting loop; returns the steps skipped.
+
+        A loop whose counter moves away from zero stops the run and is described in self.loop.
+        """
+        skipped, loop = fast_forward_counting_loop(self, budget, self.write)
+        if loop:
+            self.loop = dict(loop, step=self.steps)
+            self.running = False
+        self.steps += skipped
+        return skipped
+
+    # Memory reference instructions
+    def _lda(self, operand):
+        self.AC = self.read(self.AR)
+
+    def _str(self, operand):
+        self.write(self.AR, self.AC)
+
+    def _jmp(self, operand):
+        self.PC = self.AR - 1  # Adjust by -1 for the PC increment
+
+    def _jze(self, operand):
+        if self.AC == 0:
+            self.PC = self.AR - 1
+
+    def _jsa(self, operand):
+        self.write(self.AR, self.PC + 1)  # Save the return address in the subroutine's first word
+        self.PC = self.AR
+
+    def _and(self, operand):
+        self.AC &= self.read(self.AR)
+
+    def _or(self, operand):
+        self.AC |= self.read(self.AR)
+
+    def _xor(self, operand):
+        self.AC ^= self.read(self.AR)
+
+    def _add(self, operand):
+        result = self.AC + self.read(self.AR)
+        if result > 65535:
+            self.E = 1  # Set the carry bit in E
+            result = result - 65536
+        self.AC = result
+
+    def _sub(self, operand):
+        self.AC -= self.read(self.AR)
+
+    def _mul(self, operand):
+        self.AC = (self.AC * self.read(self.AR)) & 0xFFFF
+        self.E = 1
+
+    def _div(self, operand):
+        self.AC //= self.read(self.AR)
+
+    def _inc(self, operand):
+        value = self.read(self.AR) + 1
+        self.AC = value
+        self.write(self.AR, value)
+        if value == 0:  # Skip next instruction if the result is zero
+            self.PC += 1
+
+    def _dec(self, operand):
+        value = self.read(self.AR) - 1
+        self.AC = value
+        self.write(self.AR, value)
+        if value == 0:
+            self.PC += 1
+
+    # Register reference instructions
+    def _clr(self, operand):
+        self.AC = 0
+
+    def _cre(self, operand):
+        self.E = 0
+
+    def _cta(self, operand):
+        self.AC = ~self.AC
+
+    def _cte(self, operand):
+        self.E = ~self.E & 1
+
+    def _skz(self, operand):
+        if self.AC == 0:
+            self.PC += 1
+
+    def _ina(self, operand):
+        result = self.AC + 1
+        if result > 65535:
+            self.E = 1
+            result = result - 65536
+        self.AC = result
+
+    def _skp(self, operand):
+        if self.AC > 0:
+            self.PC += 1
+
+    def _skn(self, operand):
+        if self.AC < 0:
+            self.PC += 1
+
+    def _cra(self, operand):
+        ac_16bit = f"{self.AC:016b}"
+        self.AC = int(ac_16bit[-1] + ac_16bit[:-1], 2)  # LSB becomes MSB
+
+    def _cla(self, operand):
+        self.AC = (self.AC << 1) | (self.AC >> 31)
+
+    def _hal(self, operand):
+        self.running = False
+        self.halted = True
+
+    # Input/Output instructions
+    def _inp(self, operand):
+        if operand is not None:
+            self.AC += int(operand)
+        elif self.input_stream:
+            self.AC += self.input_stream.pop(0)
+
+    def _out(self, operand):
+        self.output.append(self.AC)
+
+    def _put(self, operand):
+        self.dma.put(self.AC)
+
+    def _opt(self, operand):
+        self.dma.start(self.AC, self.memory)
+
+    def _spi(self, operand):
+        self.dma.select(self.AC)
+
+    def _spo(self, operand):
+        self.AC = self.dma.status()
+
+    def _sfo(self, operand):
+        if self.dma.done:  # Skip next instruction once the DMA operation has completed
+            self.PC += 1
+
+    def _nop(self, operand):
+        pass
+
+    # Stack instructions
+    def _call(self, operand):
+        self.stack.push(self.PC + 1)
+        self.PC = self.AR - 1
+
+    def _ret(self, operand):
+        self.PC = self.stack.pop() - 1
+
+    def _push(self, operand):
+        self.stack.push(self.AC)
+
+    def _pop(self, operand):
+        self.AC = self.stack.pop()
@@ -0,0 +1,108 @@
+"""
+DMA block-transfer controller.
+
+Moves, fills or compares blocks of memory in one operation instead of one
+LDA/STR pair per word. The controller is programmed through the I/O
+instructions, using AC as the data bus:
+
+    SPI   select DMA register AC (0 source, 1 destination, 2 count, 3 fill value)
+    PUT   write AC to the selected register, then select the next one
+    OPT   start the operation given by AC (0 move, 1 fill, 2 compare)
+    SPO   load the result of the last operation into AC
+    SFO   skip the next instruction if the last operation is done
+
+Move and fill leave the number of words written as the result; compare
+leaves 0 when the blocks are equal, otherwise the 1-based offset of the
+first difference. A failed operation (block outside memory, unknown mode)
+leaves -1. On completion ``done`` is set, which SFO tests, and every callback
+in ``on_complete`` is called with the controller.
+"""
+
+SOURCE, DESTINATION, COUNT, FILL = 0, 1, 2, 3
+MOVE, FILL_BLOCK, COMPARE = 0, 1, 2
+
+
+class DMAController:
+    def __init__(self):
+        self.on_complete = []
+        self.reset()
+
+    def reset(self):
+        """Clears the registers and counters; completion callbacks stay attached."""
+        self.registers = [0, 0, 0, 0]  # source, destination, count, fill value
+        self.selected = SOURCE
+        self.result = 0
+        self.done = False
+        self.busy_cycles = 0  # Memory cycles used by the last operation
+        self.words_transferred = 0  # Total words moved, filled or compared
+
+    def state(self):
+        """Registers, result and counters as plain, JSON-serialisable data."""
+        return {
+            "registers": list(self.registers), "selected": self.selected,
+            "result": self.result, "done": self.done,
+            "busy_cycles": self.busy_cycles, "words_transferred": self.words_transferred,
+        }
+
+    def load_state(self, state):
+        """Restores a state produced by state(); callbacks are not called."""
+        for name, value in state.items():
+            setattr(self, name, list(value) if isinstance(value, list) else value)
+
+    def select(self, register):
+        """SPI: choose which register the next PUT writes."""
+        self.selected = register % len(self.registers)
+
+    def put(self, value):
+        """PUT: write a value to the selected register and advance the selection."""
+        self.registers[self.selected] = value
+        self.selected = (self.selected + 1) % len(self.registers)
+
+    def status(self):
+        """SPO: result of the last operation."""
+        return self.result
+
+    def start(self, mode, memory):
+        """OPT: run the operation on memory; returns the list of addresses written."""
+        source, destination, count, fill = self.registers
+        self.done = False
+        written = []
+
+        blocks = [destination] if mode == FILL_BLOCK else [source, destination]
+        if mode not in (MOVE, FILL_BLOCK, COMPARE) or count < 0 \
+                or not all(self._in_range(block, count, memory) for block in blocks):
+            self.result = -1
+        elif mode == MOVE:
+            # Read the whole block first so overlapping blocks behave like memmove
+            block = [memory[source + offset] for offset in range(count)]
+            for offset, value in enumerate(block):
+                memory[destination + offset] = value
+            written = list(range(destination, destination + count))
+            self.result = count
+        elif mode == FILL_BLOCK:
+            for offset in range(count):
+                memory[destination + offset] = str(fill)
+            written = list(range(destination, destination + count))
+            self.result = count
+        else:
+            self.result = 0
+            for offset in range(count):
+                if memory[source + offset] != memory[destination + offset]:
+                    self.result = offset + 1
+                    break
+
+        if self.result >= 0:
+            words = count if mode != COMPARE else (self.result or count)
+            self.words_transferred += words
+            self.busy_cycles = words
+        else:
+            self.busy_cycles = 0
+
+        self.done = True
+        for callback in self.on_complete:
+            callback(self)
+        return written
+
+    @staticmethod
+    def _in_range(start, count, memory):
+        return 0 <= start and start + count <= len(memory)
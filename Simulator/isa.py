@@ -0,0 +1,137 @@
+"""
+Binary encoding of the instruction set.
+
+A machine word is 16 bits: an indirect bit, a 4-bit opcode and an 11-bit
+address (the keypad's 2048 limit):
+
+    bit 15   bits 14-11   bits 10-0
+    I        opcode       address
+
+Opcode 1101 is CALL, the memory-reference stack instruction. Opcodes 1110
+and 1111 are not memory references: 1110 with I = 0 is a stack instruction
+(PUSH, POP, RET), 1111 with I = 0 a register-reference instruction and 1111
+with I = 1 an input/output instruction, each named by the single address bit
+that is set. These are the words ProcessorSimulator shows in its binary view.
+
+Every 16-bit value decodes to something. Words that match no instruction
+(opcode 1110 with I = 1, or opcodes 1110 and 1111 with no bit or several bits
+set) execute as no-ops, so data can be run as code.
+"""
+
+WORD_BITS = 16
+WORD_MASK = (1 << WORD_BITS) - 1
+ADDRESS_BITS = 11
+ADDRESS_MASK = (1 << ADDRESS_BITS) - 1
+OPCODE_SHIFT = ADDRESS_BITS
+OPCODE_MASK = 0b1111
+INDIRECT_BIT = 1 << (WORD_BITS - 1)
+REGISTER_OPCODE = 0b1111  # Register reference (I = 0) or input/output (I = 1)
+STACK_OPCODE = 0b1110  # PUSH/POP/RET (I = 0)
+
+MEMORY_REFERENCE_OPCODES = {
+    "LDA": 0b0000, "STR": 0b0001, "JMP": 0b0010, "JZE": 0b0011, "JSA": 0b0100,
+    "AND": 0b0101, "OR": 0b0110, "XOR": 0b0111, "ADD": 0b1000, "SUB": 0b1001,
+    "MUL": 0b1010, "INC": 0b1011, "DEC": 0b1100, "CALL": 0b1101
+}
+
+# Address bit that selects each register reference instruction
+REGISTER_REFERENCE_BITS = {
+    "CLR": 1 << 10, "CRE": 1 << 9, "CTA": 1 << 8, "CTE": 1 << 7, "SKZ": 1 << 6, "INA": 1 << 5,
+    "SKP": 1 << 4, "SKN": 1 << 3, "CRA": 1 << 2, "CLA": 1 << 1, "HAL": 1 << 0
+}
+
+# Address bit that selects each stack instruction
+STACK_BITS = {"PUSH": 1 << 10, "POP": 1 << 9, "RET": 1 << 8}
+
+# Address bit that selects each input/output instruction
+IO_BITS = {
+    "INP": 1 << 10, "OUT": 1 << 9, "SFI": 1 << 8, "SFO": 1 << 7, "PUT": 1 << 6,
+    "OPT": 1 << 5, "SPI": 1 << 4, "SPO": 1 << 3, "SIE": 1 << 2
+}
+
+
+def to_signed(word):
+    """Reads a 16-bit word as a two's complement value (-32768 to 32767)."""
+    return word - (1 << WORD_BITS) if word & (1 << (WORD_BITS - 1)) else word
+
+
+def encode(cell):
+    """Assembles one memory cell (``LDA I 5``, ``HAL``, ``42`` or empty) into a 16-bit word.
+
+    Raises ValueError for cells that have no binary form, such as DIV, CMP or an
+    address that does not fit in 11 bits.
+    """
+    parts = cell.split()
+    if not parts:
+        return 0
+    if len(parts) == 1:
+        try:
+            return int(parts[0]) & WORD_MASK  # Data word
+        except ValueError:
+            pass
+    return _encode_instruction(parts)
+
+
+def _encode_instruction(parts):
+    mnemonic = parts[0].upper()
+    if mnemonic in MEMORY_REFERENCE_OPCODES:
+        if len(parts) == 2:
+            indirect, address = False, parts[1]
+        elif len(parts) == 3 and parts[1].upper() == "I":
+            indirect, address = True, parts[2]
+        else:
+            raise ValueError(f"{mnemonic} needs an address: '{' '.join(parts)}'")
+        address = int(address)
+        if not 0 <= address <= ADDRESS_MASK:
+            raise ValueError(f"Address {address} does not fit in {ADDRESS_BITS} bits")
+        word = (MEMORY_REFERENCE_OPCODES[mnemonic] << OPCODE_SHIFT) | address
+        return word | INDIRECT_BIT if indirect else word
+    if len(parts) == 1:
+        if mnemonic in REGISTER_REFERENCE_BITS:
+            return (REGISTER_OPCODE << OPCODE_SHIFT) | REGISTER_REFERENCE_BITS[mnemonic]
+        if mnemonic in IO_BITS:
+            return INDIRECT_BIT | (REGISTER_OPCODE << OPCODE_SHIFT) | IO_BITS[mnemonic]
+        if mnemonic in STACK_BITS:
+            return (STACK_OPCODE << OPCODE_SHIFT) | STACK_BITS[mnemonic]
+    raise ValueError(f"No binary encoding for '{' '.join(parts)}'")
+
+
+def encode_memory(memory):
+    """Assembles a mnemonic memory image into a list of words."""
+    return [encode(cell) for cell in memory]
+
+
+_MEMORY_REFERENCE_BY_OPCODE = {opcode: mnemonic for mnemonic, opcode in MEMORY_REFERENCE_OPCODES.items()}
+_REGISTER_REFERENCE_BY_BIT = {bit: mnemonic for mnemonic, bit in REGISTER_REFERENCE_BITS.items()}
+_IO_BY_BIT = {bit: mnemonic for mnemonic, bit in IO_BITS.items()}
+_STACK_BY_BIT = {bit: mnemonic for mnemonic, bit in STACK_BITS.items()}
+
+
+def decode(word):
+    """Splits a word into (mnemonic or None, indirect, address).
+
+    address is None for register-reference, input/output and stack instructions, which have none.
+    """
+    indirect = bool(word & INDIRECT_BIT)
+    opcode = (word >> OPCODE_SHIFT) & OPCODE_MASK
+    address = word & ADDRESS_MASK
+    if opcode == STACK_OPCODE:
+        return None if indirect else _STACK_BY_BIT.get(address), indirect, None
+    if opcode != REGISTER_OPCODE:
+        return _MEMORY_REFERENCE_BY_OPCODE.get(opcode), indirect, address
+    by_bit = _IO_BY_BIT if indirect else _REGISTER_REFERENCE_BY_BIT
+    return by_bit.get(address), indirect, None
+
+
+def disassemble(word):
+    """Returns the mnemonic cell for word, or its decimal value if it is not an instruction."""
+    mnemonic, indirect, address = decode(word)
+    if mnemonic is None:
+        return str(word)
+    if address is None:
+        return mnemonic
+    return f"{mnemonic} I {address}" if indirect else f"{mnemonic} {address}"
+
+
+# word -> decode(word) for every possible word
+DECODE_TABLE = [decode(word) for word in range(1 << WORD_BITS)]
@@ -0,0 +1,40 @@
+"""
+Infinite-loop detection for program runs.
+
+Uses Brent's cycle detection over machine states: the state after every
+step is compared against one saved state, which is replaced each time the
+distance doubles. Because the machine is deterministic, seeing a state again
+means the program will repeat forever. Memory use is constant and the cycle
+is found within about twice its start plus its length.
+"""
+
+
+class LoopDetector:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Forgets all states, e.g. after the machine state was changed externally."""
+        self.saved = None
+        self.saved_hash = None
+        self.power = 1
+        self.length = 0
+        self.addresses = set()
+
+    def check(self, state, pc):
+        """Feeds the hashable state reached after a step and the PC it will execute next.
+
+        Returns None, or a dict with the cycle length in steps and the addresses it executes.
+        """
+        self.length += 1
+        self.addresses.add(pc)
+        state_hash = hash(state)
+        if state_hash == self.saved_hash and state == self.saved:
+            return {"length": self.length, "addresses": sorted(self.addresses)}
+        if self.length == self.power:
+            self.saved = state
+            self.saved_hash = state_hash
+            self.power *= 2
+            self.length = 0
+            self.addresses = set()
+        return None
@@ -0,0 +1,223 @@
+"""
+Multi-core mode: several CPU cores sharing one memory image.
+
+Each core has its own AC/PC/AR/E/IR (a BusCore is a CPU whose fetch, read and
+write go through the shared bus). Memory lives in a
+``multiprocessing.shared_memory.ShareableList`` so the cores can run in
+separate OS processes for real host parallelism, or interleaved one
+instruction at a time in this process for deterministic runs.
+
+Bus arbitration: every memory transaction is serialised by a bus lock and
+occupies ``access_cycles`` bus cycles. Bookings are kept in a shared
+reservation calendar indexed by simulated cycle, so a core that asks for the
+bus at cycle t is granted the first free slot at or after t and stalls for
+the difference. ``access_cycles=0`` models an ideal, contention-free memory.
+INC and DEC are locked read-modify-write cycles so shared counters stay
+consistent across cores.
+
+Usage (from the Simulator directory):
+    python multicore.py addition.txt --cores 4 --access-cycles 2
+"""
+import argparse
+import multiprocessing
+import time
+from multiprocessing.shared_memory import ShareableList
+
+from cpu import CPU, load_memory_file
+
+CELL_WIDTH = 24  # Characters reserved per shared memory cell
+CALENDAR_WINDOW = 1 << 16  # Simulated cycles of bus bookings remembered
+
+
+class BusArbiter:
+    """Shared bus: a host lock for atomic access plus a calendar of booked bus cycles."""
+
+    def __init__(self, access_cycles=1, window=CALENDAR_WINDOW, ctx=multiprocessing):
+        self.access_cycles = access_cycles
+        self.lock = ctx.RLock()
+        # slot (cycle % window) holds the cycle it is booked for; anything else means free
+        self.calendar = ctx.Array("q", [-1] * window, lock=False)
+
+    def reserve(self, requested):
+        """Books the first free slot at or after requested and returns its cycle; hold the lock."""
+        calendar = self.calendar
+        window = len(calendar)
+        cycles = self.access_cycles
+        granted = requested
+        while any(calendar[(granted + k) % window] == granted + k for k in range(cycles)):
+            granted += 1
+        for k in range(cycles):
+            calendar[(granted + k) % window] = granted + k
+        return granted
+
+
+class BusCore(CPU):
+    """A CPU core whose memory traffic is arbitrated by a shared BusArbiter."""
+
+    def __init__(self, core_id, memory, bus):
+        super().__init__(memory)
+        self.core_id = core_id
+        self.bus = bus
+        self.AC = core_id  # Lets shared code tell the cores apart
+        self.cycles = 0  # Simulated clock of this core
+        self.stall_cycles = 0  # Cycles spent waiting for the bus
+        self.bus_transactions = 0
+
+    def _transaction(self, operation, *args):
+        with self.bus.lock:
+            granted = self.bus.reserve(self.cycles)
+            self.stall_cycles += granted - self.cycles
+            self.cycles = granted + self.bus.access_cycles
+            self.bus_transactions += 1
+            return operation(*args)
+
+    def fetch(self, address):
+        return self._transaction(self.memory.__getitem__, address)
+
+    def read(self, address):
+        return int(self._transaction(self.memory.__getitem__, address))
+
+    def write(self, address, value):
+        value = str(value)
+        if len(value.encode()) > CELL_WIDTH:
+            raise ValueError(f"Value {value} does not fit in a shared memory cell")
+        self._transaction(self.memory.__setitem__, address, value)
+
+    def execute_next_instruction(self):
+        self.cycles += 1  # Execute cycle
+        super().execute_next_instruction()
+
+    def _inc(self, operand):
+        with self.bus.lock:
+            super()._inc(operand)
+
+    def _dec(self, operand):
+        with self.bus.lock:
+            super()._dec(operand)
+
+    def _opt(self, operand):
+        with self.bus.lock:  # The DMA owns the bus for the whole block
+            super()._opt(operand)
+
+    def result(self):
+        """Final registers and counters of this core."""
+        return {
+            "core": self.core_id, "AC": self.AC, "PC": self.PC, "AR": self.AR, "E": self.E,
+            "IR": self.IR, "halted": self.halted, "steps": self.steps, "cycles": self.cycles,
+            "stall_cycles": self.stall_cycles, "bus_transactions": self.bus_transactions,
+            "output": self.output,
+        }
+
+
+def _core_process(core_id, memory_name, bus, entry_point, max_steps, results):
+    memory = ShareableList(name=memory_name)
+    try:
+        core = BusCore(core_id, memory, bus)
+        core.PC = entry_point
+        try:
+            core.run(max_steps)
+            result = core.result()
+        except Exception as e:
+            # Always report back, otherwise the parent waits on the queue forever
+            result = core.result()
+            result["error"] = str(e)
+        results.put(result)
+    finally:
+        memory.shm.close()
+
+
+class MultiCoreSystem:
+    """Several BusCores sharing one memory image through a BusArbiter."""
+
+    def __init__(self, memory, cores=2, entry_points=None, access_cycles=1):
+        self.cores = cores
+        self.entry_points = list(entry_points) if entry_points is not None else [0] * cores
+        if len(self.entry_points) != cores:
+            raise ValueError("One entry point is needed per core")
+        self.bus = BusArbiter(access_cycles)
+        for value in memory:
+            if len(value.encode()) > CELL_WIDTH:
+                raise ValueError(f"Memory word '{value}' does not fit in a shared memory cell")
+        self.memory = ShareableList([" " * CELL_WIDTH] * len(memory))
+        for i, value in enumerate(memory):
+            self.memory[i] = value
+
+    def run(self, max_steps=None, processes=True):
+        """Runs every core until it stops; returns the per-core results ordered by core id."""
+        if processes:
+            results = self._run_processes(max_steps)
+        else:
+            results = self._run_interleaved(max_steps)
+        return sorted(results, key=lambda result: result["core"])
+
+    def _run_processes(self, max_steps):
+        queue = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(
+                target=_core_process,
+                args=(core_id, self.memory.shm.name, self.bus, self.entry_points[core_id], max_steps, queue))
+            for core_id in range(self.cores)
+        ]
+        for worker in workers:
+            worker.start()
+        results = [queue.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+        return results
+
+    def _run_interleaved(self, max_steps):
+        cores = []
+        for core_id in range(self.cores):
+            core = BusCore(core_id, self.memory, self.bus)
+            core.PC = self.entry_points[core_id]
+            core.running = True
+            cores.append(core)
+        active = list(cores)
+        while active:
+            for core in list(active):
+                if not core.running or (max_steps is not None and core.steps >= max_steps):
+                    core.running = False
+                    active.remove(core)
+                    continue
+                core.execute_next_instruction()
+        return [core.result() for core in cores]
+
+    def memory_image(self):
+        """Current contents of the shared memory as a plain list."""
+        return list(self.memory)
+
+    def close(self):
+        """Releases the shared memory block."""
+        self.memory.shm.close()
+        self.memory.shm.unlink()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a memory image on several cores with a shared bus.")
+    parser.add_argument("file", help="memory file (index:value per line)")
+    parser.add_argument("--cores", type=int, default=2)
+    parser.add_argument("--entry", type=int, nargs="*", help="start address of each core (default 0)")
+    parser.add_argument("--access-cycles", type=int, default=1, help="bus cycles per memory transaction")
+    parser.add_argument("--max-steps", type=int, default=None, help="instruction limit per core")
+    parser.add_argument("--interleaved", action="store_true", help="run all cores in this process")
+    args = parser.parse_args()
+
+    system = MultiCoreSystem(load_memory_file(args.file), args.cores, args.entry, args.access_cycles)
+    try:
+        start = time.perf_counter()
+        results = system.run(args.max_steps, processes=not args.interleaved)
+        elapsed = time.perf_counter() - start
+        for result in results:
+            print(f"core {result['core']}: steps={result['steps']} cycles={result['cycles']} "
+                  f"stalls={result['stall_cycles']} bus={result['bus_transactions']} "
+                  f"AC={result['AC']} PC={result['PC']} halted={result['halted']}")
+            if "error" in result:
+                print(f"core {result['core']} stopped with an error: {result['error']}")
+        print(f"makespan: {max(result['cycles'] for result in results)} cycles, "
+              f"total stalls: {sum(result['stall_cycles'] for result in results)}, wall time: {elapsed:.3f}s")
+    finally:
+        system.close()
+
+
+if __name__ == "__main__":
+    main()
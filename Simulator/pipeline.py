@@ -0,0 +1,186 @@
+"""
+Three-stage fetch/decode/execute pipeline model.
+
+The CPU still executes one instruction at a time. PipelineModel is a timing
+model fed with every instruction as it issues. It works out when that
+instruction would leave a pipeline with these stages:
+
+    fetch    read the instruction word at PC; the next fetch assumes PC + 1
+    decode   read the pointer (indirect) and the memory operand, resolve
+             JMP/JSA/CALL/RET and the AC tests of JZE/SKZ/SKP/SKN
+    execute  update AC and E, write memory; INC/DEC decide their skip here
+
+Stall cycles are counted per cause:
+
+    control      a taken jump or skip flushes what was fetched behind it:
+                 1 cycle if resolved in decode, 2 if resolved in execute (INC/DEC)
+    data_ac      JZE/SKZ/SKP/SKN in decode while the previous instruction is
+                 still computing AC
+    data_memory  reading a cell that the previous instruction is storing (1), or
+                 running an instruction it just overwrote, which must be refetched (2)
+    indirect     the extra decode cycle that reads the pointer
+
+An ideal run takes instructions + 2 cycles (pipeline fill), so CPI tends to 1.
+
+    cpu = PipelinedCPU(load_memory_file("addition.txt"))
+    cpu.run(1000)
+    print(cpu.pipeline.report())
+"""
+import argparse
+
+from cpu import CPU, MEMORY_REFERENCE, load_memory_file
+from isa import ADDRESS_MASK, DECODE_TABLE
+from word_cpu import WordCPU
+
+FETCH, DECODE, EXECUTE = "fetch", "decode", "execute"
+STALL_CAUSES = ("control", "data_ac", "data_memory", "indirect")
+FILL_CYCLES = 2  # Cycles before the first instruction reaches execute
+
+AC_WRITERS = {
+    "LDA", "AND", "OR", "XOR", "ADD", "SUB", "MUL", "DIV", "INC", "DEC",
+    "CLR", "CTA", "INA", "CRA", "CLA", "INP", "SPO", "POP"
+}
+AC_TESTS = {"JZE", "SKZ", "SKP", "SKN"}  # Read AC in decode
+OPERAND_READERS = {"LDA", "AND", "OR", "XOR", "ADD", "SUB", "MUL", "DIV", "INC", "DEC"}
+MEMORY_WRITERS = {"STR", "INC", "DEC", "JSA"}
+DECODE_RESOLVED = {"JMP", "JSA", "CALL", "RET"} | AC_TESTS  # Redirects known in decode; the rest in execute
+
+
+def decode_instruction(instruction, memory):
+    """Returns (mnemonic, pointer address or None, effective address or None) for a text cell or a word."""
+    if isinstance(instruction, int):
+        mnemonic, indirect, address = DECODE_TABLE[instruction]
+        if address is None or mnemonic is None:
+            return mnemonic, None, None
+        if not indirect:
+            return mnemonic, None, address
+        try:
+            return mnemonic, address, memory[address] & ADDRESS_MASK
+        except IndexError:
+            return mnemonic, address, None
+
+    parts = instruction.split()
+    mnemonic = parts[0] if parts else None
+    if mnemonic not in MEMORY_REFERENCE or len(parts) < 2:
+        return mnemonic, None, None
+    try:
+        address = int(parts[-1])
+        if len(parts) == 2:
+            return mnemonic, None, address
+        return mnemonic, address, int(memory[address])
+    except (ValueError, IndexError):
+        return mnemonic, None, None  # The CPU reports malformed instructions itself
+
+
+class PipelineModel:
+    """Cycle and stall accounting for a stream of issued instructions."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Empties the pipeline and clears all counters."""
+        self.instructions = 0
+        self.cycles = 0
+        self.stalls = dict.fromkeys(STALL_CAUSES, 0)
+        self.last = None  # (pc, mnemonic, addresses written) of the last issued instruction
+
+    def issue(self, pc, instruction, memory):
+        """Accounts for the instruction at pc, given memory before it executes; returns its stall cycles."""
+        mnemonic, pointer, address = decode_instruction(instruction, memory)
+        reads = set()
+        if pointer is not None:
+            reads.add(pointer)
+        if address is not None and mnemonic in OPERAND_READERS:
+            reads.add(address)
+
+        stalls = dict.fromkeys(STALL_CAUSES, 0)
+        if self.last is None:
+            self.cycles += FILL_CYCLES
+        else:
+            last_pc, last_mnemonic, last_writes = self.last
+            if pc != last_pc + 1:
+                # Everything fetched behind the redirect is flushed, which also clears the data hazards
+                stalls["control"] = 1 if last_mnemonic in DECODE_RESOLVED else 2
+            else:
+                if pc in last_writes:
+                    stalls["data_memory"] = 2  # Fetched before the store; refetch after it
+                elif reads & last_writes:
+                    stalls["data_memory"] = 1
+                if mnemonic in AC_TESTS and last_mnemonic in AC_WRITERS:
+                    stalls["data_ac"] = 1
+        if pointer is not None:
+            stalls["indirect"] = 1
+
+        writes = {address} if address is not None and mnemonic in MEMORY_WRITERS else set()
+        self.last = (pc, mnemonic, writes)
+        self.instructions += 1
+        stall_cycles = sum(stalls.values())
+        self.cycles += 1 + stall_cycles
+        for cause, cycles in stalls.items():
+            self.stalls[cause] += cycles
+        return stall_cycles
+
+    def stages(self, next_pc):
+        """Addresses in each stage while the last issued instruction executes; None is a bubble.
+
+        next_pc is the PC after that instruction, which shows whether decode redirected the fetch.
+        """
+        if self.last is None:
+            return {FETCH: next_pc, DECODE: None, EXECUTE: None}
+        pc, mnemonic, _ = self.last
+        if next_pc != pc + 1 and mnemonic in DECODE_RESOLVED:
+            return {FETCH: next_pc, DECODE: None, EXECUTE: pc}
+        return {FETCH: pc + 2, DECODE: pc + 1, EXECUTE: pc}
+
+    def report(self):
+        """Instructions, cycles, CPI and stall cycles per cause."""
+        return {
+            "instructions": self.instructions, "cycles": self.cycles,
+            "cpi": self.cycles / self.instructions if self.instructions else 0.0,
+            "stall_cycles": sum(self.stalls.values()), "stalls": dict(self.stalls),
+        }
+
+
+class PipelinedCPU(CPU):
+    """CPU that feeds every executed instruction to a PipelineModel."""
+
+    cacheable = False  # A cached result would skip the cycle and stall accounting
+
+    def __init__(self, memory=None, pipeline=None):
+        super().__init__(memory)
+        self.pipeline = pipeline if pipeline is not None else PipelineModel()
+
+    def reset(self, memory=None):
+        super().reset(memory)
+        self.pipeline.reset()
+
+    def execute_next_instruction(self):
+        pc = self.PC
+        if pc < len(self.memory) and self.memory[pc] != "":
+            self.pipeline.issue(pc, self.memory[pc], self.memory)
+        super().execute_next_instruction()
+
+    def _fast_forward_counting_loop(self, budget):
+        return 0  # Skipped iterations would never be issued, so every step is executed
+
+
+class PipelinedWordCPU(PipelinedCPU, WordCPU):
+    """WordCPU that feeds every executed instruction to a PipelineModel."""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a memory image through the pipeline model.")
+    parser.add_argument("file", help="memory file (index:value per line)")
+    parser.add_argument("--max-steps", type=int, default=100000)
+    args = parser.parse_args()
+
+    cpu = PipelinedCPU(load_memory_file(args.file))
+    cpu.run(args.max_steps)
+    report = cpu.pipeline.report()
+    print(f"instructions: {report['instructions']}, cycles: {report['cycles']}, CPI: {report['cpi']:.2f}")
+    print("stall cycles: " + ", ".join(f"{cause}={cycles}" for cause, cycles in report["stalls"].items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Persistent cache of program results.
+
+Maps a hash of (initial memory image, initial registers and device state,
+input stream, step limit) to the machine state and output after the run, so
+re-running an unchanged program returns immediately. DMA completions are
+recorded with the result and replayed to the controller's on_complete
+callbacks on a hit. Entries are JSON files
+in the cache directory; the least recently used ones are evicted when the
+directory grows past ``max_bytes``.
+
+    cache = ResultCache()
+    cpu = CPU(load_memory_file("addition.txt"))
+    run_cached(cpu, max_steps=1000, cache=cache)  # same effect as cpu.run(1000)
+"""
+import hashlib
+import json
+import os
+import tempfile
+
+# Bump whenever instruction semantics change so stale results are not reused
+CACHE_VERSION = 3
+
+DEFAULT_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "processor_simulator")
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class ResultCache:
+    """Directory of cached run results with LRU eviction by total size."""
+
+    def __init__(self, directory=DEFAULT_DIRECTORY, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(state, max_steps, engine="CPU"):
+        """Hash of everything that determines the outcome of a run from state on the named engine class."""
+        state = dict(state)
+        state.pop("steps", None)  # The step counter does not affect execution
+        payload = json.dumps({"version": CACHE_VERSION, "engine": engine, "state": state, "max_steps": max_steps},
+                             sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        """Returns the cached result for key, or None; a hit marks the entry as recently used."""
+        path = self._path(key)
+        try:
+            with open(path, "r") as file:
+                result = json.load(file)
+            os.utime(path)  # LRU order is kept in the file modification times
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        """Stores result under key, then evicts old entries past the size cap."""
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as file:
+            json.dump(result, file, separators=(",", ":"))
+        os.replace(temp_path, self._path(key))  # Readers never see a partial entry
+        self.evict()
+
+    def evict(self):
+        """Removes least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                info = os.stat(path)
+            except OSError:
+                continue
+            entries.append((info.st_mtime, info.st_size, path))
+            total += info.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        """Removes every cached entry."""
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                os.remove(os.path.join(self.directory, name))
+
+
+def run_cached(cpu, max_steps=None, cache=None):
+    """Runs cpu like cpu.run(max_steps), reusing a cached result when one exists.
+
+    Engines with counters that snapshot() does not hold (cpu.cacheable is False) always run.
+    On a hit, each DMA completion of the original run calls the on_complete callbacks again, in
+    order, with the controller as it was at that completion. The rest of the machine is already
+    in its final state at that point.
+    """
+    if cache is None or not cpu.cacheable:
+        return cpu.run(max_steps)
+
+    initial = cpu.snapshot()
+    key = cache.key(initial, max_steps, type(cpu).__name__)
+    result = cache.get(key)
+    if result is None:
+        completions = []
+
+        def record(dma):
+            completions.append(dma.state())
+
+        cpu.dma.on_complete.append(record)
+        try:
+            executed = cpu.run(max_steps)
+        finally:
+            cpu.dma.on_complete.remove(record)
+        final = cpu.snapshot()
+        final["steps"] = executed  # Stored relative so the entry is independent of the starting count
+        final["dma_completions"] = completions
+        cache.put(key, final)
+        return executed
+
+    executed = result["steps"]
+    result["steps"] = initial["steps"] + executed
+    completions = result.pop("dma_completions")
+    cpu.restore(result)
+    _replay_completions(cpu.dma, completions)
+    return executed
+
+
+def _replay_completions(dma, completions):
+    """Calls the on_complete callbacks once per recorded completion, then restores the final DMA state."""
+    if not completions or not dma.on_complete:
+        return
+    final = dma.state()
+    for state in completions:
+        dma.load_state(state)
+        for callback in dma.on_complete:
+            callback(dma)
+    dma.load_state(final)
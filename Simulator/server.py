@@ -0,0 +1,301 @@
+"""
+Local simulation server.
+
+Serves the headless CPU to many clients over newline-delimited JSON on a
+localhost TCP socket. Each request is one JSON object per line and gets one
+JSON response line:
+
+    -> {"id": 1, "op": "create"}
+    <- {"id": 1, "ok": true, "result": {"session": "3f2a..."}}
+    -> {"id": 2, "op": "load", "session": "3f2a...", "image": "0:LDA 16\\n1:ADD 17\\n..."}
+    -> {"id": 3, "op": "run", "session": "3f2a...", "steps": 1000}
+    <- {"id": 3, "ok": false, "error": "Unknown session 'x'"}   (on failure)
+
+Operations (all but create take "session"):
+    create                          new session; returns its id
+    load       image | memory       image text (index:value lines) or a list of cells; resets registers
+    step                            execute one instruction
+    run        steps, detect_loops  run up to steps instructions (default 10000)
+    registers                       AC, PC, AR, IR, E, SP, stack, halted, steps, output
+    memory     start, count         memory cells (default: all)
+    breakpoints addresses           replace the breakpoint set; run stops before these addresses
+    analyze                         static analysis from PC: control flow, step bound, dead image
+    close                           discard the session
+
+Sessions are spread over a pool of worker processes. Every session lives in
+one worker, and a worker handles its requests one at a time, so many clients
+share a few warm simulator processes. If a worker process dies, its
+executor is replaced, and the sessions it held are reported as lost. Their
+requests fail with a clear error until a new session is created.
+
+Usage (from the Simulator directory):
+    python server.py --port 8765 --workers 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from analyzer import analyze_memory
+from cpu import CPU, MEMORY_SIZE, parse_memory
+from stack import StackError
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_RUN_STEPS = 10000
+
+
+# ---------------------------------------------------------------- worker side
+class Session:
+    """One client's machine and breakpoints, kept inside a worker process."""
+
+    def __init__(self):
+        self.cpu = CPU()
+        self.breakpoints = set()
+
+    def load(self, params):
+        if "image" in params:
+            memory = parse_memory(params["image"].splitlines())
+        elif "memory" in params:
+            memory = [str(value).strip() for value in params["memory"]]
+            memory += [""] * (MEMORY_SIZE - len(memory))
+        else:
+            raise ValueError("load needs 'image' or 'memory'")
+        self.cpu.reset(memory)
+        return self.registers(params)
+
+    def step(self, params):
+        return self._run(1, False)
+
+    def run(self, params):
+        return self._run(int(params.get("steps", DEFAULT_RUN_STEPS)), bool(params.get("detect_loops", False)))
+
+    def _run(self, steps, detect_loops):
+        cpu = self.cpu
+        start = cpu.steps
+        try:
+            cpu.run(steps, detect_loops=detect_loops, breakpoints=self.breakpoints)
+            fault = None
+        except StackError as error:
+            cpu.running = False  # PC stays on the faulting instruction
+            fault = str(error)
+        executed = cpu.steps - start
+        if fault:
+            reason = "fault"
+        elif cpu.halted:
+            reason = "halted"
+        elif cpu.loop:
+            reason = "loop"
+        elif cpu.at_breakpoint:
+            reason = "breakpoint"
+        elif executed == steps:
+            reason = "limit"
+        else:
+            reason = "stopped"  # Empty cell or PC past the end of memory
+        result = {"executed": executed, "reason": reason, "registers": self.registers({})}
+        if cpu.loop:
+            result["loop"] = cpu.loop
+        if fault:
+            result["error"] = fault
+        return result
+
+    def registers(self, params):
+        cpu = self.cpu
+        return {"AC": cpu.AC, "PC": cpu.PC, "AR": cpu.AR, "IR": cpu.IR, "E": cpu.E,
+                "SP": cpu.stack.SP, "stack": list(cpu.stack.words),
+                "halted": cpu.halted, "steps": cpu.steps, "output": cpu.output}
+
+    def memory(self, params):
+        start = int(params.get("start", 0))
+        count = int(params.get("count", len(self.cpu.memory) - start))
+        return {"start": start, "memory": list(self.cpu.memory[start:start + count])}
+
+    def set_breakpoints(self, params):
+        self.breakpoints = {int(address) for address in params.get("addresses", [])}
+        return {"breakpoints": sorted(self.breakpoints)}
+
+    def analyze(self, params):
+        return analyze_memory(self.cpu.memory, self.cpu.PC).report()
+
+
+_sessions = {}  # Sessions owned by this worker process
+
+
+def _worker_call(session_id, op, params):
+    if op == "create":
+        _sessions[session_id] = Session()
+        return {"session": session_id}
+    session = _sessions.get(session_id)
+    if session is None:
+        raise KeyError(f"Unknown session '{session_id}'")
+    if op == "close":
+        del _sessions[session_id]
+        return {"closed": session_id}
+    handlers = {
+        "load": session.load, "step": session.step, "run": session.run,
+        "registers": session.registers, "memory": session.memory,
+        "breakpoints": session.set_breakpoints, "analyze": session.analyze,
+    }
+    if op not in handlers:
+        raise ValueError(f"Unknown operation '{op}'")
+    return handlers[op](params)
+
+
+# ---------------------------------------------------------------- server side
+class SimulationServer:
+    """asyncio front end that routes each session's requests to the worker owning it."""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, workers=None):
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.executors = []
+        self.session_worker = {}  # session id -> index into self.executors
+        self.lost_sessions = set()  # Sessions whose worker process died
+        self.server = None
+        self.clients = {}  # connection handler task -> writer
+
+    async def start(self):
+        # One single-process executor per worker, so a session's state stays in one process
+        self.executors = [ProcessPoolExecutor(max_workers=1) for _ in range(self.workers)]
+        self.server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]  # Resolves port 0 to the bound port
+        return self
+
+    async def serve_forever(self):
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+        # Let connection handlers finish instead of being cancelled under the event loop
+        for writer in self.clients.values():
+            writer.close()
+        await asyncio.gather(*self.clients, return_exceptions=True)
+        if self.server is not None:
+            await self.server.wait_closed()
+        for executor in self.executors:
+            executor.shutdown(cancel_futures=True)
+
+    async def _handle_client(self, reader, writer):
+        task = asyncio.current_task()
+        self.clients[task] = writer
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response = await self.dispatch(line)
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            del self.clients[task]
+
+    async def dispatch(self, line):
+        """Handles one request line and returns the response object."""
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            op = request.get("op")
+            if op == "create":
+                session_id = uuid.uuid4().hex
+                # Place the session on the worker holding the fewest sessions
+                counts = [0] * len(self.executors)
+                for index in self.session_worker.values():
+                    counts[index] += 1
+                self.session_worker[session_id] = counts.index(min(counts))
+            else:
+                session_id = request.get("session")
+                if session_id in self.lost_sessions:
+                    raise RuntimeError(f"Session '{session_id}' was lost when its worker process crashed")
+                if session_id not in self.session_worker:
+                    raise KeyError(f"Unknown session '{session_id}'")
+            index = self.session_worker[session_id]
+            executor = self.executors[index]
+            params = {key: value for key, value in request.items() if key not in ("id", "op", "session")}
+            try:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    executor, _worker_call, session_id, op, params)
+            except BrokenProcessPool:
+                self._replace_worker(index, executor)
+                raise RuntimeError(f"Worker {index} crashed; session '{session_id}' was lost") from None
+            if op == "close":
+                del self.session_worker[session_id]
+            return {"id": request_id, "ok": True, "result": result}
+        except Exception as e:
+            message = e.args[0] if isinstance(e, KeyError) and e.args else str(e)
+            return {"id": request_id, "ok": False, "error": message}
+
+    def _replace_worker(self, index, executor):
+        """Starts a fresh process for a worker whose process died and drops the sessions it held."""
+        if self.executors[index] is not executor:
+            return  # Another request on the same worker already replaced it
+        executor.shutdown(wait=False, cancel_futures=True)
+        self.executors[index] = ProcessPoolExecutor(max_workers=1)
+        lost = [session_id for session_id, worker in self.session_worker.items() if worker == index]
+        for session_id in lost:
+            del self.session_worker[session_id]
+        self.lost_sessions.update(lost)
+
+
+class SimulationClient:
+    """Minimal asyncio client for SimulationServer."""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+        self.next_id = 0
+
+    async def __aenter__(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+    async def call(self, op, **params):
+        """Sends one request and returns its result; raises RuntimeError on failure."""
+        self.next_id += 1
+        request = dict(params, id=self.next_id, op=op)
+        self.writer.write(json.dumps(request).encode() + b"\n")
+        await self.writer.drain()
+        response = json.loads(await self.reader.readline())
+        if not response["ok"]:
+            raise RuntimeError(response["error"])
+        return response["result"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the simulator to local clients.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    async def serve():
+        server = await SimulationServer(args.host, args.port, args.workers).start()
+        print(f"Simulation server listening on {server.host}:{server.port} with {server.workers} worker(s)")
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
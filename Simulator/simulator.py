@@ -1,13 +1,19 @@
-from PyQt5.QtCore import QPropertyAnimation, QRect
+from PyQt5.QtCore import QRect
 from PyQt5.QtWidgets import QLabel
 import time
 from PyQt5.QtWidgets import QMessageBox
 import sys
 from PyQt5.QtWidgets import QApplication, QMainWindow, QLineEdit, QComboBox, QPushButton, QCheckBox, QLabel ,QFileDialog
 from PyQt5 import uic
-from PyQt5.QtCore import QPropertyAnimation, QRect
 from PyQt5.QtWidgets import QLabel
 from PyQt5.QtCore import Qt
+from animation import FETCH, OPERAND, WRITEBACK, TransferAnimator
+from cpu import fast_forward_counting_loop, loop_state
+from dma import DMAController
+from loop_detector import LoopDetector
+from pipeline import DECODE, EXECUTE, FETCH as FETCH_STAGE, PipelineModel  # animation.FETCH is a transfer phase
+from stack import HardwareStack, StackError
+from view import WidgetView
 
 
 class ProcessorSimulator(QMainWindow):
@@ -25,6 +31,9 @@ class ProcessorSimulator(QMainWindow):
         self.IR = ""  # Instruction Register
         self.E = 0
         self.AR = 0
+        self.dma = DMAController()  # Block-transfer device behind PUT/OPT/SPI/SPO
+        self.dma.on_complete.append(self.show_dma_result)
+        self.stack = HardwareStack()  # Return addresses and values of CALL/RET/PUSH/POP
         # Mnemonics dictionary
         self.mnemonics = {
             "LDA": 0, "STR": 1, "JMP": 2, "JZE": 3, "JSA": 4,
@@ -33,7 +42,8 @@ class ProcessorSimulator(QMainWindow):
             "CLR": 15, "CRE": 16, "CTA": 17, "CTE": 18, "CPA": 19,
             "INA": 20, "SKP": 21, "SKN": 22, "CRA": 23, "CLA": 24,
             "HAL": 25, "INP": 26, "OUT": 27, "SFI": 28, "SFO": 29,
-            "PUT": 30, "OPT": 31, "SPI": 32, "SPO": 33, "SIE": 34
+            "PUT": 30, "OPT": 31, "SPI": 32, "SPO": 33, "SIE": 34,
+            "CALL": 35, "RET": 36, "PUSH": 37, "POP": 38
         }
 
 
@@ -41,7 +51,7 @@ class ProcessorSimulator(QMainWindow):
         self.memory_reference_mnemonics = {
             "LDA": "0000", "STR": "0001", "JMP": "0010", "JZE": "0011", "JSA": "0100",
             "AND": "0101", "OR": "0110", "XOR": "0111", "ADD": "1000", "SUB": "1001",
-            "MUL": "1010", "INC": "1011", "DEC": "1100"
+            "MUL": "1010", "INC": "1011", "DEC": "1100", "CALL": "1101"
         }
 
         # Mnemonics dictionary for Register Reference Instructions
@@ -58,6 +68,11 @@ class ProcessorSimulator(QMainWindow):
             "SFO": "1111100010000000", "PUT": "1111100001000000", "OPT": "1111100000100000",
             "SPI": "1111100000010000", "SPO": "1111100000001000", "SIE": "1111100000000100"
         }
+
+        # Mnemonics dictionary for Stack Instructions
+        self.stack_mnemonics = {
+            "PUSH": "0111010000000000", "POP": "0111001000000000", "RET": "0111000100000000"
+        }
        
 
         # UI Element References
@@ -73,6 +88,23 @@ class ProcessorSimulator(QMainWindow):
         self.btn_stop = self.btn_stop
         self.btn_clear = self.btn_clear
 
+        # Register and memory widgets are refreshed through the view, only when their value changes
+        self.view = WidgetView(self.memAddr_inputs + [self.ir_input, self.ac_input, self.pc_input,
+                                                      self.ar_input, self.e_input])
+        # Transfer animations reuse one animation group and a pool of labels
+        self.animator = TransferAnimator(self)
+
+        # Pipeline timing model; the status bar shows the instruction in each stage
+        self.pipeline = PipelineModel()
+        self.pipeline_label = QLabel(self)
+        self.statusBar().addPermanentWidget(self.pipeline_label)
+        self.show_pipeline()
+
+        # Stack pointer and stack contents, also in the status bar
+        self.stack_label = QLabel(self)
+        self.statusBar().addPermanentWidget(self.stack_label)
+        self.show_stack()
+
         self.btn_stop.clicked.connect(self.show_popup) # pop up connected to stop button
         self.btn_save.clicked.connect(self.save_memory)
         self.btn_load.clicked.connect(self.load_memory)
@@ -110,6 +142,7 @@ class ProcessorSimulator(QMainWindow):
 
         # Variables to Store Input
         self.input_buffer = ""
+        self.input_stream = []  # Values entered with Enter, consumed by INP
 
         # Connect Keyboard Buttons
         for i, button in enumerate(self.k_buttons):
@@ -134,7 +167,7 @@ class ProcessorSimulator(QMainWindow):
         """
         if state == Qt.Checked:
             for i, mem_addr_input in enumerate(self.memAddr_inputs):
-                binary_value = self.convert_to_binary(mem_addr_input.text(), i)
+                binary_value = self.convert_to_binary(self.view.text(mem_addr_input), i)
                 temp_line_edit = QLineEdit(binary_value)
                 temp_line_edit.setAlignment(Qt.AlignCenter)
                 temp_line_edit.setStyleSheet("background-color: lightgray; border: 1px solid gray;")
@@ -171,7 +204,7 @@ class ProcessorSimulator(QMainWindow):
             # Memory reference instruction
             address_mode = rest[0] if rest else ""
             addressing_bit = '1' if address_mode.upper() == 'I' else '0'
-            address_binary = bin(int(rest[-1]))[2:].zfill(12) if rest else '0' * 12
+            address_binary = bin(int(rest[-1]))[2:].zfill(11) if rest else '0' * 11  # I + opcode + 11-bit address = 16 bits
             return f"{addressing_bit}{self.memory_reference_mnemonics[mnemonic_upper]}{address_binary}"
 
         elif mnemonic_upper in self.register_reference_mnemonics:
@@ -182,6 +215,10 @@ class ProcessorSimulator(QMainWindow):
             # Input/Output instruction
             return self.io_mnemonics[mnemonic_upper]
 
+        elif mnemonic_upper in self.stack_mnemonics:
+            # Stack instruction
+            return self.stack_mnemonics[mnemonic_upper]
+
         return '0' * 16  # Default for unrecognized mnemonics
 
     def handle_FGO(self):
@@ -222,6 +259,8 @@ class ProcessorSimulator(QMainWindow):
         if self.fgi_checkbox.isChecked():
             # Write the input buffer to FGI_T
             self.fgi_text_browser.append(self.input_buffer)
+            if self.input_buffer:
+                self.input_stream.append(int(self.input_buffer))  # Read by the next INP
             print(f"FGI_T Updated with: {self.input_buffer}")
         else:
             print("FGI checkbox is not checked.")
@@ -279,13 +318,13 @@ class ProcessorSimulator(QMainWindow):
 
                 # Update the UI elements to reflect the loaded memory
                 for i, line_edit in enumerate(self.memAddr_inputs):
-                    line_edit.setText(self.memory[i])
+                    self.view.set_text(line_edit, self.memory[i])
                     print(f"UI updated for memory[{i}] with value: '{self.memory[i]}'")
 
-                # Force UI refresh
-                self.repaint()
-                for line_edit in self.memAddr_inputs:
-                    line_edit.repaint()
+                # Apply now, while update_memory is still disconnected; only changed cells repaint
+                self.view.flush()
+                self.pipeline.reset()
+                self.show_pipeline()
 
                 QMessageBox.information(self, "Load Memory", "Memory loaded successfully!")
 
@@ -305,7 +344,7 @@ class ProcessorSimulator(QMainWindow):
         msg.setIcon(QMessageBox.Information)
         msg.exec_()
 #********************************************************************************
-    def ac_to_memory_animation(self, memory_index):
+    def ac_to_memory_animation(self, memory_index, on_start=None):
         mi =memory_index
 
         if (memory_index < 16):
@@ -324,19 +363,9 @@ class ProcessorSimulator(QMainWindow):
         memory_widget = self.memAddr_inputs[mi]
         ac_widget = self.ac_input
 
-        content_text = ac_widget.text()
-        if not content_text.strip():
-            print("AC input is empty. Nothing to animate.")
-            return
-        
         # Reset memory widget style at the start
         memory_widget.setStyleSheet("")
 
-        animated_label = QLabel(content_text, self)
-        animated_label.setStyleSheet("background-color: yellow; border: 2px solid red; font-size: 16px;")
-        animated_label.setAlignment(ac_widget.alignment())
-        animated_label.raise_()
-
         ac_geometry = ac_widget.geometry()
         mem_geometry = memory_widget.geometry()
 
@@ -346,40 +375,25 @@ class ProcessorSimulator(QMainWindow):
         line_mid_y = start_y + 200  # Move down to the line level (adjust as per GUI)
 
         end_x, end_y = mem_geometry.x(), mem_geometry.y()
-       
-        # Set the starting geometry for the animated label
-        animated_label.setGeometry(ac_geometry)
-        animated_label.show()
-
-        animation = QPropertyAnimation(animated_label, b"geometry")
-        animation.setDuration(3000)  # Adjust duration as needed
-
 
-
-        #remove if does not work
-    
-
-       
         # Define keyframes
-        animation.setStartValue(QRect(start_x, start_y, ac_geometry.width(), ac_geometry.height()))  # Start at AC
-        animation.setKeyValueAt(0.2, QRect(start_x+100, start_y, ac_geometry.width(), ac_geometry.height())) #100 px right
-        animation.setKeyValueAt(0.4, QRect(start_x + 100, start_y + 200, ac_geometry.width(), ac_geometry.height()))  # Move down
-        animation.setKeyValueAt(0.6, QRect(start_x + 100 + 200, start_y + 200, ac_geometry.width(), ac_geometry.height()))  # Move right
-        animation.setKeyValueAt(0.8, QRect(start_x + 100 + 200, mem_geometry.y(), mem_geometry.width(), mem_geometry.height()))  # Move up
-        animation.setEndValue(QRect(end_x, end_y, mem_geometry.width(), mem_geometry.height()))  # End at memory cell
-
-        # Avoid garbage collection
-        self.animation = animation
-
-        def on_animation_finished():
-            memory_widget.setText(content_text)
+        keyframes = [
+            (0.0, QRect(start_x, start_y, ac_geometry.width(), ac_geometry.height())),  # Start at AC
+            (0.2, QRect(start_x+100, start_y, ac_geometry.width(), ac_geometry.height())), #100 px right
+            (0.4, QRect(start_x + 100, start_y + 200, ac_geometry.width(), ac_geometry.height())),  # Move down
+            (0.6, QRect(start_x + 100 + 200, start_y + 200, ac_geometry.width(), ac_geometry.height())),  # Move right
+            (0.8, QRect(start_x + 100 + 200, mem_geometry.y(), mem_geometry.width(), mem_geometry.height())),  # Move up
+            (1.0, QRect(end_x, end_y, mem_geometry.width(), mem_geometry.height())),  # End at memory cell
+        ]
+
+        def on_animation_finished(content_text):
+            if content_text.strip():
+                self.view.set_text(memory_widget, content_text)
             memory_widget.setStyleSheet("")  # Reset highlight style here
-            animated_label.deleteLater()
             print("Animation finished.")
 
-        animation.start()
-        print("Animation started.")
-        animation.finished.connect(on_animation_finished)
+        self.animator.add(WRITEBACK, lambda: self.view.text(ac_widget), ac_widget.alignment(), keyframes,
+                          on_start, on_animation_finished)
 
 #********************************************************************************
     def memory_to_ir_animation(self, memory_index):
@@ -398,74 +412,61 @@ class ProcessorSimulator(QMainWindow):
         memory_widget = self.memAddr_inputs[mi]
         ir_widget = self.ir_input
 
-        content_text = memory_widget.text()
-        if not content_text.strip():
-            print("Memory is empty. Nothing to animate.")
-            return
-
-        animated_label = QLabel(content_text, self)
-        animated_label.setStyleSheet("background-color: yellow; border: 2px solid red; font-size: 16px;")
-        animated_label.setAlignment(memory_widget.alignment())
-        animated_label.raise_()
-
         memory_geometry = memory_widget.geometry()
         start_x, start_y = memory_geometry.x(), memory_geometry.y()
 
-        # Set the starting geometry for the animated label
-        animated_label.setGeometry(memory_geometry)
-        animated_label.show()
-
-        animation = QPropertyAnimation(animated_label, b"geometry")
-        animation.setDuration(3000)  # Adjust duration as needed
-
         # Define keyframes (proportions of animation duration: 0.0 to 1.0)
-        animation.setStartValue(QRect(start_x, start_y, memory_geometry.width(), memory_geometry.height()))
-        # animation.setKeyValueAt(0.2, QRect(start_x + 100, start_y, memory_geometry.width(), memory_geometry.height()))  # 50px right
+        keyframes = [(0.0, QRect(start_x, start_y, memory_geometry.width(), memory_geometry.height()))]
         if left==0:
             start_x = start_x + 100
-            animation.setKeyValueAt(0.2, QRect(start_x, start_y, memory_geometry.width(), memory_geometry.height()))  # 50px right
+            keyframes.append((0.2, QRect(start_x, start_y, memory_geometry.width(), memory_geometry.height())))  # 50px right
         else:
             start_x = start_x - 100
-            animation.setKeyValueAt(0.2, QRect(start_x, start_y, memory_geometry.width(), memory_geometry.height()))  # 50px left
+            keyframes.append((0.2, QRect(start_x, start_y, memory_geometry.width(), memory_geometry.height())))  # 50px left
 
         x = 22*(17-memory_index)+30
         y = 1
-        animation.setKeyValueAt(0.4, QRect(start_x , start_y + x, memory_geometry.width(), memory_geometry.height()))  # 400px down
-        animation.setKeyValueAt(0.6, QRect(start_x - 200, start_y + x, memory_geometry.width(), memory_geometry.height()))  # 300px left
-        animation.setKeyValueAt(0.8, QRect(start_x - 200, start_y + (x-220), memory_geometry.width(), memory_geometry.height()))  # 200px up
-        animation.setEndValue(QRect(start_x - 250, start_y + (x-220), memory_geometry.width(), memory_geometry.height()))  # 100px left
-        # Avoid garbage collection
-        self.animation = animation
-
-        def on_animation_finished():
-            ir_widget.setText(content_text)
-            animated_label.deleteLater()
+        keyframes += [
+            (0.4, QRect(start_x , start_y + x, memory_geometry.width(), memory_geometry.height())),  # 400px down
+            (0.6, QRect(start_x - 200, start_y + x, memory_geometry.width(), memory_geometry.height())),  # 300px left
+            (0.8, QRect(start_x - 200, start_y + (x-220), memory_geometry.width(), memory_geometry.height())),  # 200px up
+            (1.0, QRect(start_x - 250, start_y + (x-220), memory_geometry.width(), memory_geometry.height())),  # 100px left
+        ]
+
+        def on_animation_finished(content_text):
+            if content_text.strip():
+                self.view.set_text(ir_widget, content_text)
             memory_widget.clearFocus()
             memory_widget.setStyleSheet("")  # Reset any custom styles
             print("Animation finished.")
 
-        animation.start()
-        print("Animation started.")
-        animation.finished.connect(on_animation_finished)
+        self.animator.add(FETCH, lambda: self.view.text(memory_widget), memory_widget.alignment(), keyframes,
+                          on_finish=on_animation_finished)
 
 
     
     #******************************************************************************
     def clear_memory(self):
         """Clears memory and resets registers."""
+        self.animator.cancel()
         for line_edit in self.memAddr_inputs:
-            line_edit.setText("")
+            self.view.set_text(line_edit, "")
         self.AC = 0
         self.PC = 0
         self.AR = 0
         self.E = 0
         self.IR = ""
-        self.ac_input.setText("0")
-        self.pc_input.setText("0")
-        self.ar_input.setText("0")
-        self.e_input.setText("0")
-        self.ir_input.setText("")
+        self.view.set_text(self.ac_input, "0")
+        self.view.set_text(self.pc_input, "0")
+        self.view.set_text(self.ar_input, "0")
+        self.view.set_text(self.e_input, "0")
+        self.view.set_text(self.ir_input, "")
         self.running = False
+        self.pipeline.reset()
+        self.show_pipeline()
+        self.dma.reset()
+        self.stack.reset()
+        self.show_stack()
         print("Memory and registers cleared.")
 
     def update_memory(self):
@@ -475,8 +476,10 @@ class ProcessorSimulator(QMainWindow):
 
     def execute_next_instruction(self):
         """Executes the instruction at the current PC."""
+        self.animator.finish()  # Complete the previous instruction before starting this one
         if self.PC >= len(self.memory):
             print("PC out of range.")
+            self.running = False
             return
     
     # AR should store the current address, and PC should store the next address
@@ -484,13 +487,16 @@ class ProcessorSimulator(QMainWindow):
         instruction = self.memory[self.PC]
         if not instruction:
             print(f"No instruction at memory location {self.PC}")
+            self.running = False  # Nothing left to execute, as in the headless CPU
             return
 
 
+        self.pipeline.issue(self.PC, instruction, self.memory)
+        self.animator.begin()
         self.memory_to_ir_animation(self.PC)
         
         self.IR = instruction  # Instruction Register stores the current instruction
-        self.ir_input.setText(self.IR)
+        self.view.set_text(self.ir_input, self.IR)
         print(f"Executing instruction: {instruction}")
     
     
@@ -502,27 +508,38 @@ class ProcessorSimulator(QMainWindow):
             operand = None
             add_bit = None
             self.AR = self.PC
-            self.ar_input.setText(str(self.AR))
+            self.view.set_text(self.ar_input, str(self.AR))
             
         elif len(components) == 2:
             command = components[0]
             operand = components[1]
             add_bit = None
             self.AR = int(operand)  # AR takes the operand (if provided)
-            self.ar_input.setText(str(self.AR))
+            self.view.set_text(self.ar_input, str(self.AR))
         elif len(components) == 3:
             command = components[0]
             add_bit = components[1]
             operand = components[2]
             self.AR = int(self.memory[int(operand)])  # AR takes the operand (if provided)
-            self.ar_input.setText(str(self.AR))
+            self.view.set_text(self.ar_input, str(self.AR))
 
         print(f"Command: {command}, Address/Bit: {add_bit}, Operand: {operand}")
-        self.decode_and_execute(command, add_bit, operand)
+        try:
+            self.decode_and_execute(command, add_bit, operand)
+        except StackError as error:
+            # Stop on the faulting instruction without updating PC
+            self.animator.start()
+            self.running = False
+            self.show_pipeline()
+            print(f"Stack error at memory address {self.PC}: {error}")
+            QMessageBox.warning(self, "Stack Error", f"{error} (memory address {self.PC}).")
+            return
+        self.animator.start()
 
         if command == "HAL":
             # If HAL is encountered, stop further execution and don't increment PC
-            self.pc_input.setText(str(self.PC+1))
+            self.view.set_text(self.pc_input, str(self.PC+1))
+            self.show_pipeline()
             self.running = False
             self.show_popup()
             return  # Exit the function without updating PC
@@ -532,11 +549,38 @@ class ProcessorSimulator(QMainWindow):
         self.PC += 1  # PC moves to the next instruction
     
         # Update the UI for PC and AR
-        self.pc_input.setText(str(self.PC))
+        self.view.set_text(self.pc_input, str(self.PC))
         #self.ar_input.setText(str(self.AR))
+        self.show_pipeline()
+
+    def show_pipeline(self):
+        """Shows the instruction in each pipeline stage, the CPI so far and the stall cycles per cause."""
+        def describe(address):
+            if address is None:
+                return "bubble"
+            if 0 <= address < len(self.memory) and self.memory[address]:
+                return f"{address}: {self.memory[address]}"
+            return f"{address}: -"
+
+        stages = self.pipeline.stages(self.PC)
+        report = self.pipeline.report()
+        stalls = ", ".join(f"{cause} {cycles}" for cause, cycles in report["stalls"].items())
+        self.pipeline_label.setText(
+            f"Fetch [{describe(stages[FETCH_STAGE])}]  Decode [{describe(stages[DECODE])}]  "
+            f"Execute [{describe(stages[EXECUTE])}]    CPI {report['cpi']:.2f}  Stalls: {stalls}")
+
+    def show_stack(self):
+        """Shows the stack pointer and the words on the stack, top first."""
+        words = ", ".join(str(word) for word in reversed(self.stack.words))
+        self.stack_label.setText(f"SP {self.stack.SP}  Stack [{words}]")
+
+    def show_dma_result(self, dma):
+        """Called by the DMA controller when an operation completes; SFO now skips."""
+        print(f"DMA complete, result: {dma.status()}")
+        self.statusBar().showMessage(f"DMA complete, result {dma.status()}")
 
 #------------------------------------------------------------------------------------------------------------
-    def memory_to_ac(self, memory_index):
+    def memory_to_ac(self, memory_index, on_start=None):
         mi =memory_index
         if (memory_index <16):
             left = 0
@@ -552,54 +596,33 @@ class ProcessorSimulator(QMainWindow):
         memory_widget = self.memAddr_inputs[mi]
         ac_widget = self.ac_input
 
-        content_text = memory_widget.text()
-        if not content_text.strip():
-            print("Memory is empty. Nothing to animate.")
-            return
-        
-        
-        animated_label = QLabel(content_text, self)
-        animated_label.setStyleSheet("background-color: yellow; border: 2px solid red; font-size: 16px;")
-        animated_label.setAlignment(memory_widget.alignment())
-        animated_label.raise_()
-
         memory_geometry = memory_widget.geometry()
         start_x, start_y = memory_geometry.x(), memory_geometry.y()
 
-        # Set the starting geometry for the animated label
-        animated_label.setGeometry(memory_geometry)
-        animated_label.show()
-
-        animation = QPropertyAnimation(animated_label, b"geometry")
-        animation.setDuration(3000)  # Adjust duration as needed
-
         # Define keyframes (proportions of animation duration: 0.0 to 1.0)
-        animation.setStartValue(QRect(start_x, start_y, memory_geometry.width(), memory_geometry.height()))
-        # animation.setKeyValueAt(0.2, QRect(start_x + 100, start_y, memory_geometry.width(), memory_geometry.height()))  # 50px right
+        keyframes = [(0.0, QRect(start_x, start_y, memory_geometry.width(), memory_geometry.height()))]
         if left==0:
             start_x = start_x + 100
-            animation.setKeyValueAt(0.2, QRect(start_x, start_y, memory_geometry.width(), memory_geometry.height()))  # 50px right
+            keyframes.append((0.2, QRect(start_x, start_y, memory_geometry.width(), memory_geometry.height())))  # 50px right
         else:
             start_x = start_x - 100
-            animation.setKeyValueAt(0.2, QRect(start_x, start_y, memory_geometry.width(), memory_geometry.height()))  # 50px left
+            keyframes.append((0.2, QRect(start_x, start_y, memory_geometry.width(), memory_geometry.height())))  # 50px left
 
         x = 23*(17-memory_index)+20
         y = 1
-        animation.setKeyValueAt(0.4, QRect(start_x , start_y + x, memory_geometry.width(), memory_geometry.height()))  # 400px down
-        animation.setKeyValueAt(0.6, QRect(start_x - 200, start_y + x, memory_geometry.width(), memory_geometry.height()))  # 300px left
-        animation.setKeyValueAt(0.8, QRect(start_x - 200, start_y + (x-220), memory_geometry.width(), memory_geometry.height()))  # 200px up
-        animation.setEndValue(QRect(start_x - 250, start_y + (x-220), memory_geometry.width(), memory_geometry.height()))  # 100px left
-        # Avoid garbage collection
-        self.animation = animation
-
-        def on_animation_finished():
-            ac_widget.setText(str(self.AC))
-            animated_label.deleteLater()
+        keyframes += [
+            (0.4, QRect(start_x , start_y + x, memory_geometry.width(), memory_geometry.height())),  # 400px down
+            (0.6, QRect(start_x - 200, start_y + x, memory_geometry.width(), memory_geometry.height())),  # 300px left
+            (0.8, QRect(start_x - 200, start_y + (x-220), memory_geometry.width(), memory_geometry.height())),  # 200px up
+            (1.0, QRect(start_x - 250, start_y + (x-220), memory_geometry.width(), memory_geometry.height())),  # 100px left
+        ]
+
+        def on_animation_finished(content_text):
+            self.view.set_text(ac_widget, str(self.AC))
             print("Animation finished.")
 
-        animation.start()
-        print("Animation started.")
-        animation.finished.connect(on_animation_finished)
+        self.animator.add(OPERAND, lambda: self.view.text(memory_widget), memory_widget.alignment(), keyframes,
+                          on_start, on_animation_finished)
 
 #------------------------------------------------------------------------------------------------------------
 
@@ -610,17 +633,15 @@ class ProcessorSimulator(QMainWindow):
                 target_address = int(self.memory[int(operand)])
 
                 def store_mem_to_ac():
-                    self.memory_to_ac(target_address)
                     self.AC = int(self.memory[target_address])
                     print(f"LDA: Loaded {self.AC} from memory address {self.PC}")
-                self.animation.finished.connect(store_mem_to_ac)    
+                self.memory_to_ac(target_address, on_start=store_mem_to_ac)
             else:
                  # Load the value from memory at the given address into the AC
                 def store_mem_to_ac():
-                    self.memory_to_ac(int(operand))
                     self.AC = int(self.memory[int(operand)])
                     print(f"LDA: Loaded {self.AC} from memory address {self.PC}")
-                self.animation.finished.connect(store_mem_to_ac) 
+                self.memory_to_ac(int(operand), on_start=store_mem_to_ac)
   
         elif command == "STR" and operand:
             # Store the value of AC into the specified memory location
@@ -629,20 +650,18 @@ class ProcessorSimulator(QMainWindow):
                memory_index = target_address
 
                def store_ac_to_memory():
-                    self.ac_to_memory_animation(memory_index)
                     self.memory[memory_index] = str(self.AC)
-                    self.memAddr_inputs[memory_index].setText(str(self.AC))
+                    self.view.set_text(self.memAddr_inputs[memory_index], str(self.AC))
                     print(f"Stored {self.AC} into memory address {operand}")
-               self.animation.finished.connect(store_ac_to_memory)
+               self.ac_to_memory_animation(memory_index, on_start=store_ac_to_memory)
             else:  
                 memory_index = int(operand)
               #  self.memory_to_ir_animation(self.PC)
                 def store_ac_to_memory():
-                    self.ac_to_memory_animation(memory_index)
                     self.memory[memory_index] = str(self.AC)
-                    self.memAddr_inputs[memory_index].setText(str(self.AC))
+                    self.view.set_text(self.memAddr_inputs[memory_index], str(self.AC))
                     print(f"Stored {self.AC} into memory address {operand}")
-                self.animation.finished.connect(store_ac_to_memory)    
+                self.ac_to_memory_animation(memory_index, on_start=store_ac_to_memory)
 
         elif command == "JMP" and operand:
             if add_bit=="I":  # Indirect Addressing
@@ -670,14 +689,14 @@ class ProcessorSimulator(QMainWindow):
                 target_address = int(self.memory[int(operand)])
                 AR = target_address
                 self.memory[AR] = str(self.PC+1)
-                self.memAddr_inputs[AR].setText(str(self.PC+1))
+                self.view.set_text(self.memAddr_inputs[AR], str(self.PC+1))
                 print(f"Saved return address {self.PC+1} to memory location {AR}")
                 self.PC = target_address
                 print(f"Jumped to address {self.PC}")
             else:    
                 AR = int(operand)  # Calculate the memory address where AR will be stored
                 self.memory[AR] = str(self.PC+1)  # Save the return address (PC + 1) to memory 
-                self.memAddr_inputs[AR].setText(str(self.PC+1))  # Update the GUI memory display
+                self.view.set_text(self.memAddr_inputs[AR], str(self.PC+1))  # Update the GUI memory display
                 print(f"Saved return address {self.PC+1} to memory location {AR}")
                 self.PC = int(operand)  # Jump to the address specified in the operand
                 print(f"Jumped to address {self.PC}")
@@ -688,15 +707,13 @@ class ProcessorSimulator(QMainWindow):
                 target_address = int(self.memory[int(operand)])
                 value = int(self.memory[target_address])
                 def store_mem_to_ac():
-                    self.memory_to_ac(target_address) 
                     self.AC &= value
-                self.animation.finished.connect(store_mem_to_ac) 
+                self.memory_to_ac(target_address, on_start=store_mem_to_ac)
             else:  # Direct addressing
                 value = int(self.memory[int(operand)])
                 def store_mem_to_ac():
-                    self.memory_to_ac(int(operand)) 
                     self.AC &= value
-                self.animation.finished.connect(store_mem_to_ac) 
+                self.memory_to_ac(int(operand), on_start=store_mem_to_ac)
 
           
 
@@ -705,15 +722,13 @@ class ProcessorSimulator(QMainWindow):
                 target_address = int(self.memory[int(operand)])
                 value = int(self.memory[target_address])
                 def store_mem_to_ac():
-                    self.memory_to_ac(target_address) 
                     self.AC |= value
-                self.animation.finished.connect(store_mem_to_ac)
+                self.memory_to_ac(target_address, on_start=store_mem_to_ac)
             else:
                 value = int(self.memory[int(operand)])
                 def store_mem_to_ac():
-                    self.memory_to_ac(int(operand)) 
                     self.AC |= value
-                self.animation.finished.connect(store_mem_to_ac)
+                self.memory_to_ac(int(operand), on_start=store_mem_to_ac)
 
 
         elif command == "XOR" and operand:
@@ -721,15 +736,13 @@ class ProcessorSimulator(QMainWindow):
                target_address=int(self.memory[int(operand)])
                value = int(self.memory[target_address])
                def store_mem_to_ac():
-                    self.memory_to_ac(target_address) 
                     self.AC ^= value
-               self.animation.finished.connect(store_mem_to_ac)
+               self.memory_to_ac(target_address, on_start=store_mem_to_ac)
             else: 
                value = int(self.memory[int(operand)])
                def store_mem_to_ac():
-                    self.memory_to_ac(int(operand)) 
                     self.AC ^= value
-               self.animation.finished.connect(store_mem_to_ac)
+               self.memory_to_ac(int(operand), on_start=store_mem_to_ac)
 
 
         elif command == "ADD" and operand:
@@ -737,25 +750,23 @@ class ProcessorSimulator(QMainWindow):
                 target_address=int(self.memory[int(operand)])            
                 value = int(self.memory[target_address])
                 def store_mem_to_ac():
-                    self.memory_to_ac(target_address) 
                     result = self.AC + value
                     if result > 65535:
                         self.E = 1  # Set the carry bit in E
                         result = result - 65536 # 17th overflow bit
-                        self.e_input.setText(str(self.E))
+                        self.view.set_text(self.e_input, str(self.E))
                     self.AC = result  
-                self.animation.finished.connect(store_mem_to_ac)        
+                self.memory_to_ac(target_address, on_start=store_mem_to_ac)
             else: 
                 value = int(self.memory[int(operand)])
                 def store_mem_to_ac():
-                    self.memory_to_ac(int(operand))
                     result = self.AC + value
                     if result > 65535:  # 17 bit result
                         self.E = 1  # Set the carry bit in E
                         result = result-65536 # result - bit 16
-                        self.e_input.setText(str(self.E))
+                        self.view.set_text(self.e_input, str(self.E))
                     self.AC = result  
-                self.animation.finished.connect(store_mem_to_ac)        
+                self.memory_to_ac(int(operand), on_start=store_mem_to_ac)
               
 
         elif command == "SUB" and operand:
@@ -763,52 +774,46 @@ class ProcessorSimulator(QMainWindow):
                 target_address=int(self.memory[int(operand)])            
                 value = int(self.memory[target_address])
                 def store_mem_to_ac():
-                    self.memory_to_ac(target_address) 
                     self.AC -= value
-                self.animation.finished.connect(store_mem_to_ac)    
+                self.memory_to_ac(target_address, on_start=store_mem_to_ac)
             else: 
                 value = int(self.memory[int(operand)])
                 def store_mem_to_ac():
-                    self.memory_to_ac(int(operand))
                     self.AC -= value
-                self.animation.finished.connect(store_mem_to_ac)
+                self.memory_to_ac(int(operand), on_start=store_mem_to_ac)
 
         elif command == "MUL" and operand:
             if add_bit=="I":
                 target_address=int(self.memory[int(operand)])            
                 value = int(self.memory[target_address])
                 def store_mem_to_ac():
-                    self.memory_to_ac(target_address) 
-                    result = result & 0xFFFF 
+                    result = (self.AC * value) & 0xFFFF
                     self.AC = result
                     self.E = 1
-                    self.e_input.setText(str(self.E))
-                self.animation.finished.connect(store_mem_to_ac)    
+                    self.view.set_text(self.e_input, str(self.E))
+                self.memory_to_ac(target_address, on_start=store_mem_to_ac)
             else:
                  value = int(self.memory[int(operand)])
                  def store_mem_to_ac():
-                     self.memory_to_ac(int(operand))
                      result=self.AC * value
                      result = result & 0xFFFF 
                      self.AC = result
                      self.E = 1
-                     self.e_input.setText(str(self.E))
-                 self.animation.finished.connect(store_mem_to_ac)    
+                     self.view.set_text(self.e_input, str(self.E))
+                 self.memory_to_ac(int(operand), on_start=store_mem_to_ac)
                  
         elif command == "DIV" and operand:
             if add_bit=="I":
                 target_address=int(self.memory[int(operand)])
                 value=int(self.memory[target_address])
                 def store_mem_to_ac():
-                    self.memory_to_ac(target_address) 
                     self.AC //= value
-                self.animation.finished.connect(store_mem_to_ac)    
+                self.memory_to_ac(target_address, on_start=store_mem_to_ac)
             else:
                 value = int(self.memory[int(operand)])
                 def store_mem_to_ac():
-                    self.memory_to_ac(int(operand))
                     self.AC //= value
-                self.animation.finished.connect(store_mem_to_ac)    
+                self.memory_to_ac(int(operand), on_start=store_mem_to_ac)
 
 
         elif command == "INC" and operand: #increment and skip if zero
@@ -818,17 +823,14 @@ class ProcessorSimulator(QMainWindow):
                 value = int(self.memory[target_address])  # Get the value at the target address
                 memory_index = target_address
                 def store_mem_to_ac():
-                    self.memory_to_ac(target_address) 
                     self.AC = value + 1  # Set the AC to the incremented value
-                    def store_ac_to_memory():
-                        self.ac_to_memory_animation(memory_index)
-                        self.memory[target_address] = str(value + 1)  # Increment the value in memory
-                        self.memAddr_inputs[target_address].setText(str(value + 1))  # Update the memory display
-                        if (value+1) == 0:  # Skip next instruction if AC is zero
-                            self.PC += 1
-                    self.animation.finished.connect(store_ac_to_memory)         
-        
-                self.animation.finished.connect(store_mem_to_ac)
+                def store_ac_to_memory():
+                    self.memory[target_address] = str(value + 1)  # Increment the value in memory
+                    self.view.set_text(self.memAddr_inputs[target_address], str(value + 1))  # Update the memory display
+                    if (value+1) == 0:  # Skip next instruction if AC is zero
+                        self.PC += 1
+                self.memory_to_ac(target_address, on_start=store_mem_to_ac)
+                self.ac_to_memory_animation(memory_index, on_start=store_ac_to_memory)
                 
             else:
                 # Direct addressing
@@ -836,17 +838,14 @@ class ProcessorSimulator(QMainWindow):
                 value = int(self.memory[target_address])  # Get the value from memory
                 memory_index = target_address
                 def store_mem_to_ac():
-                    self.memory_to_ac(target_address) 
                     self.AC = value + 1  # Set the AC to the incremented value
-                    def store_ac_to_memory():
-                        self.ac_to_memory_animation(memory_index)
-                        self.memory[target_address] = str(value + 1)  # Increment the value in memory
-                        self.memAddr_inputs[target_address].setText(str(value + 1))  # Update the memory display
-                        if (value+1) == 0:  # Skip next instruction if AC is zero
-                            self.PC += 1
-                    self.animation.finished.connect(store_ac_to_memory)         
-        
-                self.animation.finished.connect(store_mem_to_ac) 
+                def store_ac_to_memory():
+                    self.memory[target_address] = str(value + 1)  # Increment the value in memory
+                    self.view.set_text(self.memAddr_inputs[target_address], str(value + 1))  # Update the memory display
+                    if (value+1) == 0:  # Skip next instruction if AC is zero
+                        self.PC += 1
+                self.memory_to_ac(target_address, on_start=store_mem_to_ac)
+                self.ac_to_memory_animation(memory_index, on_start=store_ac_to_memory)
                 
 
 
@@ -857,34 +856,28 @@ class ProcessorSimulator(QMainWindow):
                 value = int(self.memory[target_address])  # Get the value at the target address
                 memory_index = target_address
                 def store_mem_to_ac():
-                    self.memory_to_ac(target_address) 
                     self.AC = value - 1  # Set the AC to the decremented value
-                    def store_ac_to_memory():
-                        self.ac_to_memory_animation(memory_index)
-                        self.memory[target_address] = str(value -1)  # decrement the value in memory
-                        self.memAddr_inputs[target_address].setText(str(value - 1))  # Update the memory display
-                        if (value-1) == 0:  # Skip next instruction if AC is zero
-                            self.PC += 1
-                    self.animation.finished.connect(store_ac_to_memory)         
-        
-                self.animation.finished.connect(store_mem_to_ac)
+                def store_ac_to_memory():
+                    self.memory[target_address] = str(value -1)  # decrement the value in memory
+                    self.view.set_text(self.memAddr_inputs[target_address], str(value - 1))  # Update the memory display
+                    if (value-1) == 0:  # Skip next instruction if AC is zero
+                        self.PC += 1
+                self.memory_to_ac(target_address, on_start=store_mem_to_ac)
+                self.ac_to_memory_animation(memory_index, on_start=store_ac_to_memory)
             else:
                 # Direct addressing
                 target_address = int(operand)  # Operand directly gives the target address
                 value = int(self.memory[target_address])  # Get the value from memory
                 memory_index = target_address
                 def store_mem_to_ac():
-                    self.memory_to_ac(target_address) 
                     self.AC = value - 1  # Set the AC to the decremented value
-                    def store_ac_to_memory():
-                        self.ac_to_memory_animation(memory_index)
-                        self.memory[target_address] = str(value - 1)  # decrement the value in memory
-                        self.memAddr_inputs[target_address].setText(str(value - 1))  # Update the memory display
-                        if (value-1) == 0:  # Skip next instruction if AC is zero
-                            self.PC += 1
-                    self.animation.finished.connect(store_ac_to_memory)         
-        
-                self.animation.finished.connect(store_mem_to_ac)
+                def store_ac_to_memory():
+                    self.memory[target_address] = str(value - 1)  # decrement the value in memory
+                    self.view.set_text(self.memAddr_inputs[target_address], str(value - 1))  # Update the memory display
+                    if (value-1) == 0:  # Skip next instruction if AC is zero
+                        self.PC += 1
+                self.memory_to_ac(target_address, on_start=store_mem_to_ac)
+                self.ac_to_memory_animation(memory_index, on_start=store_ac_to_memory)
 
         elif command == "CMP" and operand:
             if self.AC == int(operand):
@@ -898,14 +891,14 @@ class ProcessorSimulator(QMainWindow):
             print(f"AC cleared: {self.AC}")
         elif command == "CRE":
             self.E = 0
-            self.e_input.setText(str(self.E)) 
+            self.view.set_text(self.e_input, str(self.E)) 
             pass
         elif command == "CTA":
             self.AC = ~self.AC
             print(f"AC complemented: {self.AC}")
         elif command == "CTE":
              self.E = ~self.E & 1
-             self.e_input.setText(str(self.E)) 
+             self.view.set_text(self.e_input, str(self.E)) 
         elif command == "SKZ":
             if(self.AC==0):
                 self.PC += 1 
@@ -914,7 +907,7 @@ class ProcessorSimulator(QMainWindow):
             result = self.AC + 1
             if result > 65535:
                 self.E = 1
-                self.e_input.setText(str(self.E))
+                self.view.set_text(self.e_input, str(self.E))
                 result = result-65536
             self.AC = result
 
@@ -944,40 +937,97 @@ class ProcessorSimulator(QMainWindow):
 
         # Input/Output instructions
         elif command == "INP":
-            self.AC += int(operand)  # For now, assuming operand as input value
+            # An operand is the input value; otherwise take the next value entered on the keypad
+            if operand is not None:
+                self.AC += int(operand)
+            elif self.input_stream:
+                self.AC += self.input_stream.pop(0)
         elif command == "OUT":
             print(f"Output: {self.AC}")
         elif command == "SFI":
             # Skip on input flag
             pass
         elif command == "SFO":
-            # Skip on output flag
-            pass
+            # Skip on output flag: set once the DMA operation has completed
+            if self.dma.done:
+                self.PC += 1
         elif command == "PUT":
-            # Output to a specified I/O device
-            pass
+            # Write AC to the selected DMA register
+            self.dma.put(self.AC)
         elif command == "OPT":
-            # Perform operation on the I/O device
-            pass
+            # Start the DMA operation selected by AC (0 move, 1 fill, 2 compare)
+            memory = self.memory  # update_memory replaces self.memory on every setText
+            for address in self.dma.start(self.AC, memory):
+                self.view.set_text(self.memAddr_inputs[address], memory[address])
         elif command == "SPI":
-            # Send data to the serial peripheral interface
-            pass
+            # Select the DMA register written by the next PUT
+            self.dma.select(self.AC)
         elif command == "SPO":
-            # Receive data from the serial peripheral interface
-            pass
+            # Read the result of the last DMA operation
+            self.AC = self.dma.status()
         elif command == "SIE":
             # Set/clear input enable flag
             pass
 
+        # Stack instructions: the return address stays off program memory, so nothing is written or animated
+        elif command == "CALL" and operand:
+            target_address = int(self.memory[int(operand)]) if add_bit == "I" else int(operand)
+            self.stack.push(self.PC + 1)
+            print(f"Pushed return address {self.PC + 1}, called address {target_address}")
+            self.PC = target_address - 1  # Adjust by -1 for the PC increment
+            self.show_stack()
+        elif command == "RET":
+            self.PC = self.stack.pop() - 1
+            print(f"Returned to address {self.PC + 1}")
+            self.show_stack()
+        elif command == "PUSH":
+            self.stack.push(self.AC)
+            self.show_stack()
+        elif command == "POP":
+            self.AC = self.stack.pop()
+            self.show_stack()
+
         # Ensure that the AC value is updated in the UI
-        self.ac_input.setText(str(self.AC))
+        self.view.set_text(self.ac_input, str(self.AC))
 
     def run_program(self):
         """Starts the execution of the program."""
         self.running = True
         print("Program started.")
+        detector = LoopDetector()
         while self.running:
+            # INC/DEC counting loops are jumped over in one go, as in the headless CPU
+            skipped, loop = fast_forward_counting_loop(self)
+            if loop:
+                self.running = False
+                print(f"Diverging loop detected at addresses {loop['pc']}, {loop['pc'] + 1}")
+                QMessageBox.warning(self, "Infinite Loop",
+                                    f"The counter of the loop at memory addresses {loop['pc']} and {loop['pc'] + 1} "
+                                    f"moves away from zero, so the loop never ends. The program has been stopped.")
+                break
+            if skipped:
+                self.show_fast_forward()
+                detector.reset()
+                continue
             self.execute_next_instruction()
+            self.animator.finish()
+            # A repeated machine state means the program can never reach HAL
+            cycle = detector.check(loop_state(self), self.PC)
+            if cycle and self.running:
+                self.running = False
+                addresses = ", ".join(str(address) for address in cycle["addresses"])
+                print(f"Infinite loop detected: {cycle['length']} instruction(s) at addresses {addresses}")
+                QMessageBox.warning(self, "Infinite Loop",
+                                    f"The program repeats forever ({cycle['length']} instruction(s) "
+                                    f"at memory addresses {addresses}) and has been stopped.")
+
+    def show_fast_forward(self):
+        """Refreshes the registers and the loop counter after fast_forward_counting_loop."""
+        counter = int(self.memory[self.PC].split()[1])
+        self.view.set_text(self.memAddr_inputs[counter], self.memory[counter])
+        self.view.set_text(self.ac_input, str(self.AC))
+        self.view.set_text(self.ir_input, self.IR)
+        self.view.set_text(self.ar_input, str(self.AR))
 
     def stop_execution(self):
         """Stops the execution of the program."""
@@ -0,0 +1,46 @@
+"""
+Hardware stack.
+
+A small register file outside program memory, addressed by the stack
+pointer SP (the number of words on the stack). It backs the stack
+instructions:
+
+    CALL a   push PC + 1 and jump to a (direct or ``I`` indirect)
+    RET      pop the return address into PC
+    PUSH     push AC
+    POP      pop into AC
+
+Unlike JSA, a call keeps its return address off program memory, so
+subroutines can be recursive and reentrant, and a call writes no memory
+cell. Pushing onto a full stack or popping an empty one raises StackError.
+"""
+
+STACK_SIZE = 16
+
+
+class StackError(RuntimeError):
+    """Stack overflow or underflow."""
+
+
+class HardwareStack:
+    def __init__(self, size=STACK_SIZE):
+        self.size = size
+        self.reset()
+
+    def reset(self):
+        """Empties the stack."""
+        self.words = []  # Bottom first; SP == len(words)
+
+    @property
+    def SP(self):
+        return len(self.words)
+
+    def push(self, value):
+        if len(self.words) >= self.size:
+            raise StackError(f"Stack overflow: more than {self.size} words")
+        self.words.append(value)
+
+    def pop(self):
+        if not self.words:
+            raise StackError("Stack underflow: RET or POP with an empty stack")
+        return self.words.pop()
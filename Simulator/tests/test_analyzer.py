@@ -0,0 +1,92 @@
+"""
+Static analysis of memory images: step bounds, loops and unreachable cells.
+
+Run from the Simulator directory:
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+import pytest
+
+SIMULATOR_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SIMULATOR_DIR)
+
+from analyzer import analyze_memory  # noqa: E402
+from cpu import CPU, MEMORY_SIZE, load_memory_file  # noqa: E402
+
+
+def image(cells):
+    memory = [""] * MEMORY_SIZE
+    for address, cell in cells.items():
+        memory[address] = cell
+    return memory
+
+
+BOUNDED = {
+    "addition.txt": load_memory_file(os.path.join(SIMULATOR_DIR, "addition.txt")),
+    "SUBROUTINE.txt": load_memory_file(os.path.join(SIMULATOR_DIR, "SUBROUTINE.txt")),
+    "counting_loop": image({0: "LDA 10", 1: "ADD 11", 2: "DEC 12", 3: "JMP 1", 4: "HAL",
+                            10: "0", 11: "3", 12: "6"}),
+    "nested_calls": image({0: "CALL 5", 1: "CALL 5", 2: "HAL", 5: "CALL 9", 6: "INA", 7: "RET",
+                           9: "INA", 10: "RET"}),
+    "jsa_from_two_sites": image({0: "JSA 8", 1: "JSA 8", 2: "HAL", 8: "0", 9: "INA", 10: "JMP I 8"}),
+}
+
+
+@pytest.mark.parametrize("name", BOUNDED)
+def test_bound_covers_the_real_run(name):
+    analysis = analyze_memory(BOUNDED[name])
+    assert analysis.step_bound is not None, analysis.bound_reason
+    cpu = CPU(list(BOUNDED[name]))
+    cpu.run(analysis.step_bound + 1)
+    assert not cpu.running
+    assert cpu.steps <= analysis.step_bound
+
+
+def test_bound_is_exact_for_loop_free_code():
+    assert analyze_memory(BOUNDED["addition.txt"]).step_bound == 7
+
+
+@pytest.mark.parametrize("cells, reason", [
+    ({0: "JMP 0"}, "jumps to itself forever"),
+    ({0: "LDA 5", 1: "JMP 0", 5: "3"}, "no counter bounds the loop"),
+    ({0: "INC 5", 1: "JMP 0", 2: "HAL", 5: "1"}, "never reaches zero"),
+])
+def test_infinite_loops_are_unbounded(cells, reason):
+    analysis = analyze_memory(image(cells))
+    assert analysis.step_bound is None
+    assert reason in analysis.bound_reason
+
+
+def test_loop_without_exit_is_dead():
+    assert analyze_memory(image({0: "LDA 5", 1: "JMP 0", 5: "3"})).dead
+    assert not analyze_memory(BOUNDED["counting_loop"]).dead
+
+
+def test_unreachable_cells():
+    analysis = analyze_memory(image({0: "LDA 6", 1: "JMP 4", 2: "OUT", 3: "7", 4: "HAL", 6: "1"}))
+    assert analysis.unreachable == [2, 3]  # Skipped code and data nothing reads; 6 is read by LDA
+    assert analysis.reachable == [0, 1, 4]
+
+
+def test_dma_blocks_are_data():
+    analysis = analyze_memory(load_memory_file(os.path.join(SIMULATOR_DIR, "dma_copy.txt")))
+    assert analysis.dma_blocks == [(9, [12, 13, 14, 15, 20, 21, 22, 23])]
+    assert analysis.unreachable == []
+
+
+def test_dma_fill_block_is_data():
+    analysis = analyze_memory(image({0: "CLR", 1: "ADD 20", 2: "SPI", 3: "LDA 21", 4: "PUT", 5: "LDA 22",
+                                     6: "PUT", 7: "LDA 20", 8: "OPT", 9: "HAL", 12: "5", 13: "5", 14: "9",
+                                     20: "1", 21: "12", 22: "2"}))
+    assert analysis.dma_blocks == [(8, [12, 13])]
+    assert analysis.unreachable == [14]
+
+
+def test_unknown_dma_block_reports_no_unreachable_cells():
+    # The block registers depend on input, so any cell may be transferred
+    analysis = analyze_memory(image({0: "CLR", 1: "SPI", 2: "INP", 3: "PUT", 4: "PUT", 5: "PUT", 6: "CLR",
+                                     7: "OPT", 8: "HAL", 12: "1"}))
+    assert analysis.dma_blocks is None
+    assert analysis.unreachable == []
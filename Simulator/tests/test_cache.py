@@ -0,0 +1,106 @@
+"""
+Cache model: replacement and write policies, and cached CPU runs.
+
+Run from the Simulator directory:
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache import Cache, CacheHierarchy, CachedCPU, CachedWordCPU  # noqa: E402
+from cpu import CPU, MEMORY_SIZE, load_memory_file  # noqa: E402
+from isa import encode_memory  # noqa: E402
+from word_cpu import WordCPU  # noqa: E402
+
+SIMULATOR_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def hierarchy(**options):
+    return CacheHierarchy([Cache(**options)], memory_cycles=10)
+
+
+def accesses(cache_hierarchy, trace):
+    """Feeds ("r" or "w", address) pairs; returns True for each L1 hit."""
+    level = cache_hierarchy.levels[0]
+    results = []
+    for kind, address in trace:
+        hits = level.hits
+        cache_hierarchy.access(address, kind == "w")
+        results.append(level.hits > hits)
+    return results
+
+
+@pytest.mark.parametrize("replacement, last_hit", [("lru", True), ("fifo", False)])
+def test_replacement_policy_picks_the_victim(replacement, last_hit):
+    # One set of two lines: 0 is reused before 2 arrives, so LRU evicts 1 and FIFO evicts 0
+    h = hierarchy(size=2, line_size=1, ways=2, replacement=replacement)
+    assert accesses(h, [("r", 0), ("r", 1), ("r", 0), ("r", 2), ("r", 0)]) == [False, False, True, False, last_hit]
+    assert h.levels[0].evictions == 1 + (not last_hit)
+
+
+def test_direct_mapped_lines_conflict_on_the_set_index():
+    h = hierarchy(size=4, line_size=2, ways=1)  # Two sets: lines 0 and 2 (addresses 0-1 and 4-5) share set 0
+    assert accesses(h, [("r", 0), ("r", 1), ("r", 4), ("r", 0), ("r", 2)]) == [False, True, False, False, False]
+
+
+def test_write_back_allocates_and_defers_the_store():
+    h = hierarchy(size=2, line_size=1, ways=1, write_policy="write-back")
+    assert accesses(h, [("w", 5), ("r", 5), ("w", 5)]) == [False, True, True]
+    stats = h.levels[0].stats()
+    assert (stats["hits"], stats["misses"], h.memory_accesses) == (2, 1, 1)  # Only the line fill
+    accesses(h, [("r", 7)])  # Same set: evicts the dirty line
+    assert (h.levels[0].writebacks, h.memory_accesses) == (1, 3)
+
+
+def test_write_through_does_not_allocate_and_stores_every_write():
+    h = hierarchy(size=2, line_size=1, ways=1, write_policy="write-through")
+    assert accesses(h, [("w", 5), ("r", 5), ("w", 5)]) == [False, False, True]
+    stats = h.levels[0].stats()
+    assert (stats["hits"], stats["misses"], h.memory_accesses) == (1, 2, 3)
+    accesses(h, [("r", 7)])
+    assert (h.levels[0].writebacks, h.memory_accesses) == (0, 4)
+
+
+def test_cycles_per_access():
+    h = CacheHierarchy([Cache(size=4, line_size=2, hit_cycles=1),
+                        Cache(size=8, line_size=2, ways=2, hit_cycles=4, name="L2")], memory_cycles=10)
+    assert [h.access(address) for address in (0, 1, 0)] == [1 + 4 + 10, 1, 1]
+    assert h.cycles == 17 and h.report()["reads"] == 3
+
+
+@pytest.mark.parametrize("options", [dict(size=6, line_size=3), dict(size=6, line_size=2), dict(size=5)])
+def test_invalid_geometry_is_rejected(options):
+    with pytest.raises(ValueError):
+        Cache(**options)
+
+
+def test_cached_cpu_matches_cpu_and_counts_cycles():
+    memory = load_memory_file(os.path.join(SIMULATOR_DIR, "addition.txt"))
+    plain, cached = CPU(list(memory)), CachedCPU(list(memory))
+    plain.run(1000)
+    cached.run(1000)
+    assert cached.snapshot() == plain.snapshot()
+    report = cached.report()
+    assert report["reads"] + report["writes"] == 7 + 5 + 1  # Fetches, LDA/ADD operands, STR
+    assert cached.cycles == report["total_cycles"] == cached.steps + cached.hierarchy.cycles
+
+
+def test_cached_word_cpu_matches_word_cpu():
+    memory = encode_memory(load_memory_file(os.path.join(SIMULATOR_DIR, "addition.txt")))
+    memory += [0] * (MEMORY_SIZE - len(memory))
+    plain, cached = WordCPU(list(memory)), CachedWordCPU(list(memory))
+    plain.run(1000)
+    cached.run(1000)
+    assert cached.snapshot() == plain.snapshot()
+    assert cached.report()["reads"] > 0
+
+
+def test_reset_clears_the_counters():
+    cpu = CachedCPU(load_memory_file(os.path.join(SIMULATOR_DIR, "addition.txt")))
+    cpu.run(1000)
+    cpu.reset()
+    assert cpu.cycles == 0 and cpu.hierarchy.report()["reads"] == 0
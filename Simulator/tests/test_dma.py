@@ -0,0 +1,115 @@
+"""
+DMA controller and the PUT/OPT/SPI/SPO/SFO instructions that program it.
+
+Run from the Simulator directory:
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+import pytest
+
+SIMULATOR_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SIMULATOR_DIR)
+
+from cpu import CPU, MEMORY_SIZE, load_memory_file  # noqa: E402
+from dma import COMPARE, DESTINATION, FILL_BLOCK, MOVE, DMAController  # noqa: E402
+from isa import encode_memory  # noqa: E402
+from word_cpu import WordCPU  # noqa: E402
+
+
+def image(cells):
+    memory = [""] * MEMORY_SIZE
+    for address, cell in cells.items():
+        memory[address] = cell
+    return memory
+
+
+def programmed(registers):
+    dma = DMAController()
+    for value in registers:
+        dma.put(value)
+    return dma
+
+
+def test_put_advances_the_selected_register():
+    dma = DMAController()
+    dma.select(DESTINATION)
+    dma.put(20)
+    dma.put(4)
+    assert dma.registers == [0, 20, 4, 0]
+    dma.select(5)  # Register numbers wrap around
+    dma.put(9)
+    assert dma.registers == [0, 9, 4, 0]
+
+
+def test_move_handles_overlapping_blocks():
+    memory = [str(value) for value in range(8)]
+    written = programmed([0, 2, 4]).start(MOVE, memory)
+    assert memory == ["0", "1", "0", "1", "2", "3", "6", "7"]
+    assert written == [2, 3, 4, 5]
+
+
+def test_fill_and_compare():
+    memory = ["1", "2", "3", "1", "2", "4"]
+    dma = programmed([0, 3, 3, 7])
+    dma.start(COMPARE, memory)
+    assert dma.status() == 3  # 1-based offset of the first difference
+    dma.registers[COMPARE] = 2
+    dma.start(COMPARE, memory)
+    assert dma.status() == 0
+    assert dma.start(FILL_BLOCK, memory) == [3, 4]
+    assert memory[3:] == ["7", "7", "4"]
+
+
+@pytest.mark.parametrize("registers, mode", [([0, 30, 4], MOVE), ([0, 0, -1], FILL_BLOCK), ([0, 0, 1], 5)])
+def test_failed_operations_leave_memory_alone(registers, mode):
+    memory = [str(value) for value in range(32)]
+    dma = programmed(registers)
+    assert dma.start(mode, memory) == []
+    assert dma.status() == -1 and dma.done
+    assert memory == [str(value) for value in range(32)]
+
+
+def test_completion_calls_every_callback():
+    dma = programmed([0, 2, 1])
+    seen = []
+    dma.on_complete.append(lambda controller: seen.append(("first", controller.status())))
+    dma.on_complete.append(lambda controller: seen.append(("second", controller.done)))
+    dma.start(MOVE, ["5", "6", "7"])
+    assert seen == [("first", 1), ("second", True)]
+    dma.reset()
+    assert len(dma.on_complete) == 2 and not dma.done
+
+
+@pytest.mark.parametrize("engine", [CPU, WordCPU])
+def test_dma_copy_sample(engine):
+    memory = load_memory_file(os.path.join(SIMULATOR_DIR, "dma_copy.txt"))
+    cpu = engine(encode_memory(memory) if engine is WordCPU else memory)
+    completions = []
+    cpu.dma.on_complete.append(completions.append)
+    cpu.run(1000)
+    assert cpu.halted and cpu.steps == 12
+    assert cpu.AC == 4  # SPO: words moved
+    assert [int(value) for value in cpu.memory[20:24]] == [1, 2, 3, 4]
+    assert completions == [cpu.dma]
+    assert cpu.dma.words_transferred == 4
+
+
+def test_sfo_skips_only_after_completion():
+    # SFO falls through to HAL before OPT, and skips it after
+    cpu = CPU(image({0: "SFO", 1: "JMP 3", 2: "HAL", 3: "CLR", 4: "SPI", 5: "LDA 20", 6: "PUT", 7: "LDA 21",
+                     8: "PUT", 9: "LDA 22", 10: "PUT", 11: "CLR", 12: "OPT", 13: "SFO", 14: "HAL", 15: "SPO",
+                     16: "HAL", 20: "24", 21: "28", 22: "2", 24: "8", 25: "9"}))
+    cpu.run(1000)
+    assert cpu.halted and cpu.PC == 16
+    assert cpu.AC == 2 and cpu.memory[28:30] == ["8", "9"]
+
+
+def test_fill_from_instructions():
+    # Select the destination register, program destination 26, count 3 and fill value 7, then fill
+    cpu = CPU(image({0: "LDA 20", 1: "SPI", 2: "LDA 21", 3: "PUT", 4: "LDA 22", 5: "PUT", 6: "LDA 23", 7: "PUT",
+                     8: "LDA 20", 9: "OPT", 10: "SPO", 11: "HAL", 20: "1", 21: "26", 22: "3", 23: "7"}))
+    cpu.run(100)
+    assert cpu.halted and cpu.AC == 3
+    assert cpu.memory[26:29] == ["7", "7", "7"] and cpu.memory[29] == ""
@@ -0,0 +1,145 @@
+"""
+ProcessorSimulator runs under Qt's offscreen platform.
+
+Skipped when PyQt5 is not installed. Run from the Simulator directory:
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+SIMULATOR_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SIMULATOR_DIR)
+
+pytest.importorskip("PyQt5")
+
+from PyQt5.QtCore import qInstallMessageHandler  # noqa: E402
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+import simulator  # noqa: E402
+from cpu import CPU, MEMORY_SIZE, load_memory_file  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def app():
+    qInstallMessageHandler(lambda *args: None)  # Offscreen plugin and stylesheet warnings
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def window(app, monkeypatch, capsys):
+    monkeypatch.chdir(SIMULATOR_DIR)  # The .ui file is loaded by relative path
+    warnings = []
+    monkeypatch.setattr(simulator.ProcessorSimulator, "show_popup", lambda *args: None)  # HAL's message box
+    monkeypatch.setattr(simulator.QMessageBox, "warning",
+                        staticmethod(lambda parent, title, text: warnings.append((title, text))))
+    window = simulator.ProcessorSimulator()
+    window.warnings = warnings
+    yield window
+    window.animator.cancel()
+    window.close()
+    window.deleteLater()
+
+
+def load(window, cells):
+    for address, cell in cells.items():
+        window.view.set_text(window.memAddr_inputs[address], cell)
+    window.view.flush()  # textChanged -> update_memory
+
+
+def image(cells):
+    memory = [""] * MEMORY_SIZE
+    for address, cell in cells.items():
+        memory[address] = cell
+    return memory
+
+
+def test_fast_forwarded_loop_ends_like_a_stepped_run(window):
+    cells = {0: "LDA 6", 1: "DEC 7", 2: "JMP 1", 3: "OUT", 4: "HAL", 6: "9", 7: "25"}
+    load(window, cells)
+    window.run_program()
+    window.view.flush()
+
+    cpu = CPU(image(cells))
+    cpu.run(1000)  # Steps every iteration
+    assert (window.AC, window.PC, window.memory) == (cpu.AC, cpu.PC, cpu.memory)
+    assert window.view.text(window.memAddr_inputs[7]) == "0"
+    assert window.pipeline.report()["instructions"] < cpu.steps  # Only the last iterations were executed
+    assert window.warnings == []
+
+
+def test_diverging_loop_warns(window):
+    load(window, {0: "INC 5", 1: "JMP 0", 5: "1"})
+    window.run_program()
+    assert not window.running
+    assert [title for title, text in window.warnings] == ["Infinite Loop"]
+    assert "moves away from zero" in window.warnings[0][1]
+    assert window.memory[5] == "1"
+
+
+def test_infinite_loop_stops_with_a_message(window):
+    load(window, {0: "LDA 5", 1: "JMP 0", 5: "3"})
+    window.run_program()
+    assert not window.running
+    assert [title for title, text in window.warnings] == ["Infinite Loop"]
+    assert "memory addresses 0, 1" in window.warnings[0][1]
+
+
+def load_file(window, name):
+    memory = load_memory_file(os.path.join(SIMULATOR_DIR, name))
+    load(window, dict(enumerate(memory)))
+    return memory
+
+
+# Images covering each instruction class; every path ends on HAL or an empty cell
+PROGRAMS = {
+    "alu": {0: "LDA 20", 1: "AND 21", 2: "OR 22", 3: "XOR 23", 4: "ADD 24", 5: "SUB 25", 6: "MUL 26",
+            7: "STR 27", 8: "HAL", 20: "13", 21: "7", 22: "8", 23: "3", 24: "40", 25: "2", 26: "3"},
+    "indirect": {0: "LDA I 20", 1: "ADD I 21", 2: "STR I 22", 3: "JMP I 23", 5: "HAL", 20: "24", 21: "25",
+                 22: "26", 23: "5", 24: "9", 25: "4"},
+    "skips_and_jumps": {0: "LDA 20", 1: "SKP", 2: "HAL", 3: "DEC 21", 4: "JMP 3", 5: "JZE 8", 6: "INA",
+                        7: "HAL", 8: "CTA", 9: "SKN", 10: "HAL", 11: "INC 22", 12: "JMP 11", 13: "HAL",
+                        20: "5", 21: "3", 22: "-2"},
+    "registers": {0: "LDA 20", 1: "CTE", 2: "CRE", 3: "INA", 4: "CRA", 5: "CLA", 6: "CLR", 7: "HAL", 20: "6"},
+    "jsa": {0: "LDA 20", 1: "JSA 10", 2: "STR 21", 3: "HAL", 10: "0", 11: "ADD 20", 12: "JMP I 10", 20: "7"},
+    "stack": {0: "LDA 20", 1: "CALL 10", 2: "PUSH", 3: "HAL", 10: "PUSH", 11: "INA", 12: "STR 21", 13: "POP",
+              14: "RET", 20: "9"},
+}
+
+
+def final_state(machine):
+    return {"AC": machine.AC, "PC": machine.PC, "E": machine.E, "memory": list(machine.memory), "stack": list(machine.stack.words)}
+
+
+@pytest.mark.parametrize("name", ["addition.txt", "SUBROUTINE.txt", "dma_copy.txt"])
+def test_sample_programs_match_the_headless_cpu(window, name):
+    memory = load_file(window, name)
+    window.run_program()
+    window.view.flush()
+
+    cpu = CPU(list(memory))
+    cpu.run(1000)
+    assert final_state(window) == final_state(cpu)
+    assert window.warnings == []
+
+
+@pytest.mark.parametrize("name", PROGRAMS)
+def test_instruction_classes_match_the_headless_cpu(window, name):
+    load(window, PROGRAMS[name])
+    window.run_program()
+    window.view.flush()
+
+    cpu = CPU(image(PROGRAMS[name]))
+    cpu.run(1000)
+    assert cpu.halted
+    assert final_state(window) == final_state(cpu)
+    assert window.warnings == []
+
+
+def test_dma_completion_is_shown(window):
+    load_file(window, "dma_copy.txt")
+    window.run_program()
+    assert window.statusBar().currentMessage() == "DMA complete, result 4"
+    assert window.AC == 4 and window.memory[20:24] == ["1", "2", "3", "4"]
@@ -0,0 +1,68 @@
+"""
+Counting-loop fast-forward and infinite-loop detection in the headless CPU.
+
+Run from the Simulator directory:
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cpu import CPU, MEMORY_SIZE, fast_forward_counting_loop  # noqa: E402
+
+
+def image(cells):
+    memory = [""] * MEMORY_SIZE
+    for address, cell in cells.items():
+        memory[address] = cell
+    return memory
+
+
+COUNTING_LOOPS = {
+    "dec_to_zero": {0: "DEC 5", 1: "JMP 0", 2: "HAL", 5: "40"},
+    "inc_to_zero": {0: "LDA 6", 1: "INC 7", 2: "JMP 1", 3: "OUT", 4: "HAL", 6: "9", 7: "-25"},
+}
+
+
+def test_fast_forward_matches_stepped_run():
+    for cells in COUNTING_LOOPS.values():
+        stepped, fast = CPU(image(cells)), CPU(image(cells))
+        stepped.run(10000)
+        fast.run(10000, detect_loops=True)
+        assert fast.snapshot() == stepped.snapshot()
+        assert fast.halted and fast.loop is None
+
+
+def test_fast_forward_respects_the_step_budget():
+    stepped, fast = CPU(image(COUNTING_LOOPS["dec_to_zero"])), CPU(image(COUNTING_LOOPS["dec_to_zero"]))
+    stepped.run(21)
+    fast.run(21, detect_loops=True)
+    assert fast.snapshot() == stepped.snapshot()
+
+
+def test_helper_reports_a_diverging_counter():
+    cpu = CPU(image({0: "INC 5", 1: "JMP 0", 5: "1"}))
+    assert fast_forward_counting_loop(cpu) == (0, {"length": 2, "addresses": [0, 1], "pc": 0, "diverges": True})
+    assert cpu.memory[5] == "1"  # Nothing was executed
+
+
+def test_helper_skips_full_iterations_only():
+    cpu = CPU(image(COUNTING_LOOPS["dec_to_zero"]))
+    assert fast_forward_counting_loop(cpu) == (78, None)
+    assert cpu.memory[5] == "1" and cpu.AC == 1 and cpu.PC == 0
+    assert fast_forward_counting_loop(cpu) == (0, None)  # The last DEC is left to run
+
+
+def test_diverging_loop_stops_the_run():
+    cpu = CPU(image({0: "INC 5", 1: "JMP 0", 5: "1"}))
+    cpu.run(10000, detect_loops=True)
+    assert cpu.loop["diverges"] and cpu.loop["addresses"] == [0, 1]
+    assert cpu.steps == 0 and not cpu.halted
+
+
+def test_repeated_state_stops_the_run():
+    cpu = CPU(image({0: "LDA 5", 1: "JMP 0", 5: "3"}))
+    cpu.run(10000, detect_loops=True)
+    assert cpu.loop["diverges"] is False and cpu.loop["addresses"] == [0, 1]
+    assert cpu.steps < 10
@@ -0,0 +1,108 @@
+"""
+Persistent run results: hits, misses, keys, eviction and DMA callbacks.
+
+Run from the Simulator directory:
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache import CachedCPU  # noqa: E402
+from cpu import CPU, load_memory_file  # noqa: E402
+from result_cache import ResultCache, run_cached  # noqa: E402
+from word_cpu import WordCPU  # noqa: E402
+
+SIMULATOR_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def program(name):
+    return load_memory_file(os.path.join(SIMULATOR_DIR, name))
+
+
+def entries(cache):
+    return sorted(name for name in os.listdir(cache.directory) if name.endswith(".json"))
+
+
+def test_miss_then_hit_restores_the_same_state(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    first = CPU(program("addition.txt"))
+    assert run_cached(first, 1000, cache) == 7
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    second = CPU(program("addition.txt"))
+    second.steps = 5  # Cached steps are relative to the start of the run
+    assert run_cached(second, 1000, cache) == 7
+    assert (cache.hits, cache.misses) == (1, 1)
+    expected = first.snapshot()
+    expected["steps"] = 12
+    assert second.snapshot() == expected
+    assert not second.running and second.halted
+    assert len(entries(cache)) == 1
+
+
+def test_key_depends_on_engine_input_and_step_limit():
+    state = CPU(program("addition.txt")).snapshot()
+    base = ResultCache.key(state, 1000)
+    assert ResultCache.key(state, 1000, "CPU") == base
+    assert ResultCache.key(state, 1000, "WordCPU") != base
+    assert ResultCache.key(state, 999, "CPU") != base
+    assert ResultCache.key(dict(state, input_stream=[3]), 1000) != base
+    assert ResultCache.key(dict(state, steps=40), 1000) == base  # The step counter does not matter
+
+
+def test_engines_do_not_share_entries(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    run_cached(CPU(program("addition.txt")), 1000, cache)
+    run_cached(WordCPU([0] * 32), 1000, cache)
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert len(entries(cache)) == 2
+
+
+def test_input_stream_changes_the_result(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    memory = ["INP", "OUT", "HAL"] + [""] * 29
+    outputs = []
+    for value in (3, 4, 3):
+        cpu = CPU(list(memory))
+        cpu.input_stream = [value]
+        run_cached(cpu, 100, cache)
+        outputs.append(cpu.output)
+    assert outputs == [[3], [4], [3]]
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_uncacheable_engines_always_run(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    for _ in range(2):
+        cpu = CachedCPU(program("addition.txt"))
+        run_cached(cpu, 1000, cache)
+        assert cpu.report()["reads"] > 0
+    assert entries(cache) == [] and (cache.hits, cache.misses) == (0, 0)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=10 ** 9)
+    for name, when in (("a", 100), ("b", 200), ("c", 300)):
+        cache.put(name, {"payload": "x" * 100})
+        os.utime(cache._path(name), (when, when))
+    size = os.path.getsize(cache._path("a"))
+    assert cache.get("a") is not None  # Now the most recently used
+    cache.max_bytes = 2 * size
+    cache.evict()
+    assert entries(cache) == ["a.json", "c.json"]
+    assert cache.get("b") is None
+
+
+def test_dma_callbacks_fire_on_hit_and_miss(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    seen = []
+    for _ in range(2):
+        cpu = CPU(program("dma_copy.txt"))
+        cpu.dma.on_complete.append(lambda dma: seen.append((dma.status(), dma.done, list(dma.registers))))
+        run_cached(cpu, 1000, cache)
+        assert len(cpu.dma.on_complete) == 1  # The recorder used on a miss is removed again
+        assert cpu.memory[20:24] == ["1", "2", "3", "4"]
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert seen == [(4, True, [12, 20, 4, 0])] * 2
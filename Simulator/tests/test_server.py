@@ -0,0 +1,140 @@
+"""
+SimulationServer on an ephemeral localhost port, driven through SimulationClient.
+
+Run from the Simulator directory:
+    python -m pytest -q tests
+"""
+import asyncio
+import json
+import os
+import signal
+import sys
+
+import pytest
+
+SIMULATOR_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SIMULATOR_DIR)
+
+from server import SimulationClient, SimulationServer  # noqa: E402
+
+
+def serve(test, workers=1):
+    """Runs the coroutine function test(server) against a started server, then closes it."""
+    async def main():
+        server = await SimulationServer(port=0, workers=workers).start()
+        try:
+            await test(server)
+        finally:
+            await server.close()
+    asyncio.run(main())
+
+
+def read_image(name):
+    with open(os.path.join(SIMULATOR_DIR, name)) as file:
+        return file.read()
+
+
+def test_load_run_and_registers():
+    async def test(server):
+        async with SimulationClient(port=server.port) as client:
+            session = (await client.call("create"))["session"]
+            loaded = await client.call("load", session=session, image=read_image("addition.txt"))
+            assert loaded["PC"] == 0 and loaded["steps"] == 0
+            result = await client.call("run", session=session, steps=1000)
+            assert result["reason"] == "halted" and result["executed"] == 7
+            assert result["registers"]["AC"] == 75
+            memory = await client.call("memory", session=session, start=15, count=1)
+            assert memory == {"start": 15, "memory": ["75"]}
+            assert (await client.call("close", session=session)) == {"closed": session}
+    serve(test)
+
+
+def test_breakpoints_stop_and_resume():
+    async def test(server):
+        async with SimulationClient(port=server.port) as client:
+            session = (await client.call("create"))["session"]
+            await client.call("load", session=session, image=read_image("SUBROUTINE.txt"))
+            assert (await client.call("breakpoints", session=session, addresses=[9, 3])) == {"breakpoints": [3, 9]}
+            first = await client.call("run", session=session)
+            assert first["reason"] == "breakpoint" and first["registers"]["PC"] == 9
+            second = await client.call("run", session=session)
+            assert second["reason"] == "breakpoint" and second["registers"]["PC"] == 3
+            await client.call("breakpoints", session=session, addresses=[])
+            assert (await client.call("step", session=session))["registers"]["PC"] == 4
+    serve(test)
+
+
+def test_detect_loops_and_analyze():
+    async def test(server):
+        async with SimulationClient(port=server.port) as client:
+            session = (await client.call("create"))["session"]
+            await client.call("load", session=session, memory=["LDA 5", "JMP 0", "", "", "", "3"])
+            report = await client.call("analyze", session=session)
+            assert report["step_bound"] is None and report["edges"]["1"] == [0]  # JSON object keys are strings
+            result = await client.call("run", session=session, steps=1000, detect_loops=True)
+            assert result["reason"] == "loop" and result["loop"]["addresses"] == [0, 1]
+    serve(test)
+
+
+def test_stack_fault_is_reported():
+    async def test(server):
+        async with SimulationClient(port=server.port) as client:
+            session = (await client.call("create"))["session"]
+            await client.call("load", session=session, memory=["RET"])
+            result = await client.call("run", session=session)
+            assert result["reason"] == "fault" and "underflow" in result["error"]
+            assert result["registers"]["PC"] == 0
+    serve(test)
+
+
+def test_error_replies():
+    async def test(server):
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        try:
+            writer.write(b"{not json\n")
+            writer.write(json.dumps({"id": 7, "op": "run", "session": "nope"}).encode() + b"\n")
+            await writer.drain()
+            malformed = json.loads(await reader.readline())
+            unknown = json.loads(await reader.readline())
+        finally:
+            writer.close()
+            await writer.wait_closed()
+        assert malformed["ok"] is False and malformed["id"] is None and malformed["error"]
+        assert unknown == {"id": 7, "ok": False, "error": "Unknown session 'nope'"}
+
+        async with SimulationClient(port=server.port) as client:
+            session = (await client.call("create"))["session"]
+            with pytest.raises(RuntimeError, match="Unknown operation 'fly'"):
+                await client.call("fly", session=session)
+    serve(test)
+
+
+def test_sessions_are_spread_over_workers():
+    async def test(server):
+        async with SimulationClient(port=server.port) as client:
+            sessions = [(await client.call("create"))["session"] for _ in range(4)]
+            assert sorted(server.session_worker[session] for session in sessions) == [0, 0, 1, 1]
+    serve(test, workers=2)
+
+
+def test_crashed_worker_is_replaced():
+    async def test(server):
+        async with SimulationClient(port=server.port) as client:
+            lost = (await client.call("create"))["session"]
+            survivor = (await client.call("create"))["session"]
+            await client.call("load", session=survivor, image=read_image("addition.txt"))
+            crashed = server.session_worker[lost]
+            for pid in list(server.executors[crashed]._processes):
+                os.kill(pid, signal.SIGKILL)
+
+            with pytest.raises(RuntimeError, match=f"Worker {crashed} crashed; session '{lost}' was lost"):
+                await client.call("run", session=lost)
+            with pytest.raises(RuntimeError, match="was lost when its worker process crashed"):
+                await client.call("registers", session=lost)
+
+            result = await client.call("run", session=survivor)  # Other workers are unaffected
+            assert result["registers"]["AC"] == 75
+            fresh = (await client.call("create"))["session"]
+            await client.call("load", session=fresh, image=read_image("addition.txt"))
+            assert (await client.call("run", session=fresh))["reason"] == "halted"
+    serve(test, workers=2)
@@ -0,0 +1,120 @@
+"""
+Hardware stack: CALL/RET/PUSH/POP in both engines, faults and loop detection.
+
+Run from the Simulator directory:
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cpu import CPU, MEMORY_SIZE, loop_state  # noqa: E402
+from isa import encode_memory  # noqa: E402
+from stack import STACK_SIZE, HardwareStack, StackError  # noqa: E402
+from word_cpu import WordCPU  # noqa: E402
+
+
+def image(cells):
+    memory = [""] * MEMORY_SIZE
+    for address, cell in cells.items():
+        memory[address] = cell
+    return memory
+
+
+# main calls outer twice; outer pushes AC, calls inner, pops and returns
+NESTED = {0: "CALL 10", 1: "CALL 10", 2: "OUT", 3: "HAL",
+          10: "PUSH", 11: "CALL 20", 12: "POP", 13: "INA", 14: "RET",
+          20: "INA", 21: "INA", 22: "OUT", 23: "RET"}
+
+
+@pytest.mark.parametrize("engine", [CPU, WordCPU])
+def test_nested_calls_return_in_order(engine):
+    memory = image(NESTED)
+    cpu = engine(encode_memory(memory) if engine is WordCPU else memory)
+    cpu.run(1000)
+    assert cpu.halted and cpu.PC == 3
+    assert cpu.output == [2, 3, 2]  # inner sees AC + 2; POP restores the pushed AC before INA
+    assert cpu.AC == 2 and cpu.stack.SP == 0
+
+
+def test_call_writes_no_memory():
+    memory = image(NESTED)
+    cpu = CPU(list(memory))
+    cpu.run(1000)
+    assert cpu.memory == memory
+
+
+def test_recursion_depth_follows_the_stack():
+    cpu = CPU(image({0: "CALL 5", 1: "HAL", 5: "CALL 5"}))
+    cpu.run(3)
+    assert cpu.stack.words == [1, 6, 6]
+
+
+def test_overflow_raises_stack_error():
+    cpu = CPU(image({0: "CALL 0"}))
+    with pytest.raises(StackError, match="overflow"):
+        cpu.run(1000)
+    assert cpu.stack.SP == STACK_SIZE and cpu.steps == STACK_SIZE
+    assert cpu.PC == 0  # The faulting CALL is not executed
+
+
+@pytest.mark.parametrize("instruction", ["RET", "POP"])
+def test_underflow_raises_stack_error(instruction):
+    cpu = CPU(image({0: "INA", 1: instruction, 2: "HAL"}))
+    with pytest.raises(StackError, match="underflow"):
+        cpu.run(1000)
+    assert cpu.PC == 1 and cpu.AC == 1
+
+
+def test_push_overflow_in_word_mode():
+    cpu = WordCPU(encode_memory(image({0: "PUSH", 1: "JMP 0"})))
+    with pytest.raises(StackError):
+        cpu.run(1000)
+    assert cpu.stack.SP == STACK_SIZE
+
+
+def test_hardware_stack_limits():
+    stack = HardwareStack(size=2)
+    stack.push(1)
+    stack.push(2)
+    with pytest.raises(StackError):
+        stack.push(3)
+    assert [stack.pop(), stack.pop()] == [2, 1]
+    with pytest.raises(StackError):
+        stack.pop()
+    assert issubclass(StackError, RuntimeError)
+
+
+def test_loop_state_includes_the_stack():
+    first, second = CPU(image({0: "HAL"})), CPU(image({0: "HAL"}))
+    second.stack.push(5)
+    assert loop_state(first) != loop_state(second)
+    first.stack.push(5)
+    assert loop_state(first) == loop_state(second)
+
+
+def test_growing_stack_is_not_a_repeated_state():
+    # Every pass pushes one more word, so no state repeats until the stack overflows
+    cpu = CPU(image({0: "PUSH", 1: "JMP 0"}))
+    with pytest.raises(StackError):
+        cpu.run(1000, detect_loops=True)
+    assert cpu.loop is None
+
+
+def test_balanced_push_pop_loop_is_detected():
+    cpu = CPU(image({0: "PUSH", 1: "POP", 2: "JMP 0"}))
+    cpu.run(1000, detect_loops=True)
+    assert cpu.loop is not None and cpu.loop["addresses"] == [0, 1, 2]
+
+
+def test_snapshot_round_trips_the_stack():
+    cpu = CPU(image({0: "CALL 5", 5: "PUSH", 6: "HAL"}))
+    cpu.run(10)
+    state = cpu.snapshot()
+    assert state["stack"] == [1, 0]
+    other = CPU()
+    other.restore(state)
+    assert other.stack.words == [1, 0]
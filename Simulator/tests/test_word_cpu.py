@@ -0,0 +1,72 @@
+"""
+Text and word execution of the same image must end in the same state.
+
+Run from the Simulator directory:
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cpu import CPU, MEMORY_SIZE  # noqa: E402
+from isa import encode_memory, to_signed  # noqa: E402
+from word_cpu import WordCPU  # noqa: E402
+
+# Every path ends on HAL: word mode would run data and empty cells as instructions
+IMAGES = {
+    "skn_after_negative_load": ["LDA 4", "SKN", "HAL", "HAL", "-2"],
+    "skp_after_positive_load": ["LDA 4", "SKP", "HAL", "HAL", "7"],
+    "skn_after_cta": ["CLR", "CTA", "SKN", "HAL", "HAL"],
+    "skn_after_sub": ["CLR", "SUB 5", "SKN", "HAL", "HAL", "3"],
+    "store_and_reload_negative": ["CLR", "SUB 7", "STR 8", "LDA 8", "SKN", "HAL", "HAL", "9", "0"],
+    "jze_on_zero_sum": ["LDA 4", "ADD 5", "JZE 6", "HAL", "-3", "3", "HAL"],
+    "inc_from_negative_skips": ["INC 4", "JMP 0", "OUT", "HAL", "-3"],
+    "dec_to_negative": ["DEC 4", "SKN", "HAL", "HAL", "0"],
+}
+
+
+def run(cpu):
+    cpu.run(1000)
+    return {"AC": cpu.AC, "PC": cpu.PC, "E": cpu.E, "halted": cpu.halted, "steps": cpu.steps,
+            "output": cpu.output}
+
+
+def pad(cells):
+    return cells + [""] * (MEMORY_SIZE - len(cells))
+
+
+@pytest.mark.parametrize("name", IMAGES)
+def test_word_mode_matches_text_mode(name):
+    text = CPU(pad(IMAGES[name]))
+    word = WordCPU(encode_memory(pad(IMAGES[name])))
+    assert run(word) == run(text)
+    data = [address for address, cell in enumerate(text.memory) if cell.lstrip("-").isdigit()]
+    assert [to_signed(word.memory[address]) for address in data] == [int(text.memory[address]) for address in data]
+
+
+def test_stored_negative_loads_back_negative():
+    cpu = WordCPU(encode_memory(pad(["LDA 4", "SKN", "HAL", "HAL", "-2"])))
+    cpu.run(1000)
+    assert cpu.AC == -2
+    assert cpu.halted and cpu.PC == 3  # SKN skipped the first HAL
+
+
+def test_decode_table_is_shared_between_instances():
+    first, second = WordCPU(), WordCPU()
+    assert first.decode_table is second.decode_table is WordCPU.decode_table
+    assert "decode_table" not in vars(first)
+
+
+def test_subclass_decode_table_uses_its_overrides():
+    class CountingCPU(WordCPU):
+        def _out(self, operand):
+            self.output.append("counted")
+
+    cpu = CountingCPU(encode_memory(pad(["OUT", "HAL"])))
+    cpu.run(10)
+    assert cpu.output == ["counted"]
+    assert CountingCPU.decode_table is not WordCPU.decode_table
+    assert WordCPU(encode_memory(pad(["OUT", "HAL"]))).decode_table[encode_memory(["OUT"])[0]][0] is CPU._out
@@ -0,0 +1,55 @@
+"""
+Diff-based refresh of the register and memory widgets.
+
+WidgetView keeps the text each watched QLineEdit currently shows and only
+calls setText on widgets whose value really changed. Updates are queued and
+applied together on the next turn of the Qt event loop, so a burst of
+instructions causes one round of repaints instead of several per
+instruction. The cached text follows the widget's textChanged signal, so
+edits typed by the user (or made directly with setText) keep it correct.
+"""
+from PyQt5.QtCore import QTimer
+
+
+class WidgetView:
+    def __init__(self, widgets=()):
+        self.displayed = {}  # widget -> text it currently shows
+        self.pending = {}  # widget -> text to show at the next flush
+        self.scheduled = False
+        self.writes = 0  # setText calls made
+        self.skipped = 0  # Updates dropped because nothing changed
+        for widget in widgets:
+            self.watch(widget)
+
+    def watch(self, widget):
+        """Starts tracking the text shown by widget."""
+        self.displayed[widget] = widget.text()
+        widget.textChanged.connect(lambda text, widget=widget: self.displayed.__setitem__(widget, text))
+
+    def set_text(self, widget, text):
+        """Queues text for widget; unchanged values never reach the widget."""
+        if self.displayed.get(widget) == text:
+            self.pending.pop(widget, None)  # A newer value may cancel a queued one
+            self.skipped += 1
+            return
+        self.pending[widget] = text
+        if not self.scheduled:
+            self.scheduled = True
+            QTimer.singleShot(0, self.flush)
+
+    def text(self, widget):
+        """The text widget will show once pending updates are applied."""
+        if widget in self.pending:
+            return self.pending[widget]
+        if widget in self.displayed:
+            return self.displayed[widget]
+        return widget.text()
+
+    def flush(self):
+        """Applies all queued updates now."""
+        self.scheduled = False
+        pending, self.pending = self.pending, {}
+        for widget, text in pending.items():
+            if self.displayed.get(widget) != text:
+                widget.setText(text)
+                self.writes += 1
@@ -0,0 +1,161 @@
+"""
+Native 16-bit word execution.
+
+WordCPU runs memory images of 16-bit machine words (see isa.py) instead of
+mnemonic strings. Every fetch is decoded with one lookup into a table that
+holds the handler and address for all 65536 possible words, so there is no
+text parsing while running. The table is built once per class and shared by
+all of its instances. Because memory holds plain words, programs can
+modify their own instructions and data can be executed as code.
+
+    cpu = WordCPU(load_word_file("addition.txt"))
+    cpu.run(1000)
+
+Memory cells are 16 bits wide: stores keep the low 16 bits of AC, and INC/DEC
+wrap around instead of growing past the word size. Operands are read as two's
+complement, so a stored -2 loads back as -2 and SKN/SKP/JZE test AC exactly
+as in text mode.
+"""
+
+from cpu import CPU, MEMORY_SIZE, parse_memory
+from isa import (ADDRESS_MASK, DECODE_TABLE, MEMORY_REFERENCE_OPCODES, OPCODE_SHIFT, WORD_BITS, WORD_MASK, encode,
+                 to_signed)
+
+_JMP = MEMORY_REFERENCE_OPCODES["JMP"] << OPCODE_SHIFT
+_SIGN_BIT = 1 << (WORD_BITS - 1)
+_WORDS = 1 << WORD_BITS
+
+
+def parse_word(cell):
+    """Converts one image cell to a word: 16 binary digits, a decimal value or a mnemonic."""
+    cell = cell.strip()
+    if len(cell) == WORD_BITS and set(cell) <= {"0", "1"}:
+        return int(cell, 2)
+    return encode(cell)
+
+
+def load_word_file(file_path, size=MEMORY_SIZE):
+    """Reads an ``index:value`` memory file into a list of words; values may be binary or mnemonic."""
+    with open(file_path, "r") as file:
+        return [parse_word(cell) for cell in parse_memory(file, size)]
+
+
+def save_word_file(file_path, memory):
+    """Writes a list of words as ``index:bbbbbbbbbbbbbbbb`` lines."""
+    with open(file_path, "w") as file:
+        for i, word in enumerate(memory):
+            file.write(f"{i}:{word:0{WORD_BITS}b}\n")
+
+
+def build_decode_table(cls):
+    """word -> (handler function, indirect, address or None) for a CPU class.
+
+    Handlers are the class's unbound methods, called as ``handler(cpu, address)``. Words that
+    are not instructions decode to ``_nop``.
+    """
+    functions = {mnemonic: getattr(cls, name) for mnemonic, name in cls.HANDLERS.items()}
+    nop = cls._nop
+    return [(functions.get(mnemonic, nop), indirect, address) for mnemonic, indirect, address in DECODE_TABLE]
+
+
+class WordCPU(CPU):
+    """CPU that fetches raw 16-bit words and decodes them through a 65536-entry table."""
+
+    decode_table = None  # Built by build_decode_table below, and again for every subclass
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.decode_table = build_decode_table(cls)  # Subclasses may override handlers
+
+    def __init__(self, memory=None):
+        super().__init__(memory if memory is not None else [0] * MEMORY_SIZE)
+        self.IR = 0
+
+    def reset(self, memory=None):
+        super().reset(memory)
+        self.IR = 0
+
+    # Memory holds words, so reads need no parsing and writes keep 16 bits
+    def read(self, address):
+        word = self.memory[address]
+        return word - _WORDS if word & _SIGN_BIT else word  # to_signed, inlined on the hot path
+
+    def write(self, address, value):
+        self.memory[address] = value & WORD_MASK
+
+    def execute_next_instruction(self):
+        """Executes the word at the current PC."""
+        pc = self.PC
+        if pc >= len(self.memory):
+            self.running = False
+            return
+        word = self.fetch(pc)
+        self.IR = word
+        handler, indirect, address = self.decode_table[word]
+        if address is None:
+            self.AR = pc  # Register reference and I/O words carry no address
+        elif indirect:
+            self.AR = self.read(address) & ADDRESS_MASK  # Indirect: AR takes the pointer's address bits
+        else:
+            self.AR = address
+        handler(self, address)
+        self.steps += 1
+
+        if self.halted:
+            return  # HAL leaves PC on the halting instruction
+        self.PC += 1
+
+    def _fast_forward_counting_loop(self, budget):
+        """Word version of CPU._fast_forward_counting_loop.
+
+        The counter wraps at 16 bits, so ``p: INC/DEC x`` / ``p+1: JMP p`` always ends and never diverges.
+        """
+        pc = self.PC
+        if pc + 1 >= len(self.memory) or self.memory[pc + 1] != _JMP | pc:
+            return 0
+        mnemonic, indirect, counter = DECODE_TABLE[self.memory[pc]]
+        if mnemonic not in ("INC", "DEC") or indirect or counter >= len(self.memory):
+            return 0
+        if counter in (pc, pc + 1):
+            return 0  # Self-modifying loop
+
+        direction = 1 if mnemonic == "INC" else -1
+        value = self.memory[counter]
+        iterations = (-value * direction) & WORD_MASK or 1 << WORD_BITS  # Steps of the counter until zero
+        full = iterations - 1
+        if budget is not None:
+            full = min(full, budget // 2)
+        if full <= 0:
+            return 0
+        value = (value + direction * full) & WORD_MASK
+        self.write(counter, value)
+        self.AC = to_signed(value)
+        self.IR = self.memory[pc + 1]
+        self.AR = pc  # As left by the last JMP
+        self.steps += 2 * full
+        return 2 * full
+
+    def _inc(self, operand):
+        value = (self.read(self.AR) + 1) & WORD_MASK
+        if value & _SIGN_BIT:
+            value -= _WORDS
+        self.AC = value
+        self.write(self.AR, value)
+        if value == 0:  # Skip next instruction if the result is zero
+            self.PC += 1
+
+    def _dec(self, operand):
+        value = (self.read(self.AR) - 1) & WORD_MASK
+        if value & _SIGN_BIT:
+            value -= _WORDS
+        self.AC = value
+        self.write(self.AR, value)
+        if value == 0:
+            self.PC += 1
+
+    def _opt(self, operand):
+        for address in self.dma.start(self.AC, self.memory):
+            self.memory[address] = int(self.memory[address]) & WORD_MASK  # FILL writes text values
+
+
+WordCPU.decode_table = build_decode_table(WordCPU)